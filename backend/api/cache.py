@@ -0,0 +1,217 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+VERSION_KEY = 'version:{}'
+MODIFIED_KEY = 'modified:{}'
+RESPONSE_KEY = 'response:{}'
+STATS_KEY = 'response_cache:{}'
+
+CATALOG_VERSION = 'catalog'
+RECIPES_VERSION = 'recipes'
+RECIPE_VERSION = 'recipe:{}'
+TAGS_VERSION = 'tags'
+INGREDIENTS_VERSION = 'ingredients'
+USER_VERSION = 'user:{}'
+
+
+def _initial_version():
+    """
+    Начальное значение счётчика поколений.
+    Основано на времени, чтобы после вытеснения ключа из кеша
+    счётчик не вернулся к уже выданному значению.
+    """
+    return int(time.time() * 1000)
+
+
+def get_versions(*names):
+    """Возвращает текущие значения счётчиков поколений по их именам."""
+    keys = [VERSION_KEY.format(name) for name in names]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(*names):
+    """
+    Увеличивает счётчики поколений, делая устаревшими зависимые ключи,
+    и запоминает время изменения.
+    """
+    for name in names:
+        key = VERSION_KEY.format(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), timeout=None)
+    cache.set_many(
+        {MODIFIED_KEY.format(name): int(time.time()) for name in names},
+        timeout=None
+    )
+
+
+def get_last_modified(*names):
+    """Время последнего изменения данных с указанными счётчиками."""
+    keys = [MODIFIED_KEY.format(name) for name in names]
+    stamps = cache.get_many(keys)
+    for key in keys:
+        if key not in stamps:
+            cache.add(key, int(time.time()), timeout=None)
+            stamps[key] = cache.get(key)
+    return max(stamps.values())
+
+
+def _incr_stat(name):
+    key = STATS_KEY.format(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def get_stats():
+    """Возвращает количество попаданий и промахов кеша ответов."""
+    keys = {name: STATS_KEY.format(name) for name in ('hits', 'misses')}
+    values = cache.get_many(keys.values())
+    return {name: values.get(key, 0) for name, key in keys.items()}
+
+
+def reset_stats():
+    """Обнуляет статистику кеша ответов."""
+    cache.delete_many([STATS_KEY.format(name) for name in ('hits', 'misses')])
+
+
+def request_fingerprint(request, *parts):
+    """
+    Хеш запроса: хост, путь, нормализованная строка запроса
+    и дополнительные части (версии данных, пользователь).
+    """
+    query = '&'.join(
+        f'{key}={",".join(sorted(request.query_params.getlist(key)))}'
+        for key in sorted(request.query_params)
+    )
+    raw = '|'.join((
+        request.get_host(),
+        request.path,
+        query,
+        *map(str, parts),
+    ))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def build_cache_key(request, versions):
+    """Ключ ответа для набора версий данных, от которых он зависит."""
+    return RESPONSE_KEY.format(request_fingerprint(request, *versions))
+
+
+class AnonymousResponseCacheMixin:
+    """
+    Кеширует ответы list и retrieve для анонимных пользователей.
+    Ответы инвалидируются сменой счётчиков поколений (см. api.signals).
+    """
+
+    def get_cache_versions(self):
+        """Имена счётчиков поколений, от которых зависит ответ."""
+        if self.action == 'retrieve':
+            return (
+                CATALOG_VERSION,
+                RECIPE_VERSION.format(self.kwargs[self.lookup_field]),
+            )
+        return CATALOG_VERSION, RECIPES_VERSION
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        if (
+            not settings.RESPONSE_CACHE_ENABLED
+            or request.user.is_authenticated
+        ):
+            return handler(request, *args, **kwargs)
+
+        key = build_cache_key(
+            request, get_versions(*self.get_cache_versions())
+        )
+        data = cache.get(key)
+        if data is not None:
+            _incr_stat('hits')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        _incr_stat('misses')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class ConditionalGetMixin:
+    """
+    Поддержка условных GET-запросов для list и retrieve.
+    ETag и Last-Modified вычисляются по счётчикам поколений
+    без обращения к базе и рендеринга ответа,
+    на If-None-Match и If-Modified-Since отдаётся 304.
+    Если ответ не зависит от пользователя (condition_per_user = False),
+    ETag общий для всех пользователей.
+    """
+    condition_versions = ()
+    condition_per_user = True
+
+    def get_condition_versions(self):
+        """Имена счётчиков поколений, от которых зависит ответ."""
+        if hasattr(self, 'get_cache_versions'):
+            names = list(self.get_cache_versions())
+        else:
+            names = list(self.condition_versions)
+        if self.condition_per_user and self.request.user.is_authenticated:
+            names.append(USER_VERSION.format(self.request.user.pk))
+        return names
+
+    def _conditional_response(self, handler, request, *args, **kwargs):
+        names = self.get_condition_versions()
+        etag = quote_etag(request_fingerprint(
+            request,
+            request.accepted_renderer.format,
+            request.user.pk if self.condition_per_user else None,
+            *get_versions(*names),
+        ))
+        last_modified = get_last_modified(*names)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if 200 <= response.status_code < 300 or response.status_code == 304:
+            # Сжатое представление отличается побайтно, поэтому,
+            # как и GZipMiddleware, помечаем ETag слабым.
+            if response.get('Content-Encoding'):
+                response['ETag'] = 'W/' + etag
+            else:
+                response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Бэкенды, данные которых не видны другим процессам.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Без общего кеша смена счётчиков поколений в одном процессе
+    не видна остальным: кеш ответов, ETag и индексы в памяти
+    устаревают. Такой кеш допустим только при DEBUG.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.DEBUG or backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Error(
+        f'Кеш {backend} не общий для процессов.',
+        hint=(
+            'Укажите в CACHE_BACKEND общий бэкенд, например '
+            'django.core.cache.backends.db.DatabaseCache '
+            '(таблица создаётся командой createcachetable).'
+        ),
+        id='api.E001',
+    )]
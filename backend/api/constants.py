@@ -1,2 +1,7 @@
 DEFAULT_PAGE_SIZE = 6
 DEFAULT_RECIPES_LIMIT = 3
+INGREDIENT_SEARCH_LIMIT = 50
+INGREDIENT_SIMILARITY_THRESHOLD = 0.3
+INGREDIENT_WORD_START_BOOST = 0.3
+BATCH_MAX_SIZE = 100
+PANTRY_MAX_INGREDIENTS = 100
@@ -0,0 +1,88 @@
+import csv
+import json
+import tempfile
+
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from openpyxl import Workbook
+
+EXPORT_FILENAME = 'shopping_cart'
+EXPORT_TITLE = 'Список покупок'
+EXPORT_HEADER = ('Ингредиент', 'Единица измерения', 'Количество')
+
+
+class Echo:
+    """Псевдобуфер для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def export_txt(rows):
+    yield f'{EXPORT_TITLE}:\n\n'
+    for name, unit, amount in rows:
+        yield f'{name} ({unit}) — {amount}\n'
+
+
+def export_csv(rows):
+    writer = csv.writer(Echo())
+    # BOM, чтобы Excel распознал UTF-8.
+    yield '\ufeff' + writer.writerow(EXPORT_HEADER)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def export_json(rows):
+    separator = '['
+    for name, unit, amount in rows:
+        yield separator + json.dumps(
+            {'name': name, 'measurement_unit': unit, 'amount': amount},
+            ensure_ascii=False
+        )
+        separator = ','
+    yield ']' if separator == ',' else '[]'
+
+
+def export_xlsx(rows):
+    """
+    Книга в режиме write_only пишет строки во временные файлы,
+    поэтому память не растёт с размером списка. Готовый файл
+    отдаётся из временного файла кусками.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(EXPORT_TITLE)
+    sheet.append(EXPORT_HEADER)
+    for row in rows:
+        sheet.append(row)
+    file = tempfile.TemporaryFile()
+    workbook.save(file)
+    file.seek(0)
+    return file
+
+
+STREAM_EXPORTS = {
+    'txt': (export_txt, 'text/plain; charset=utf-8'),
+    'csv': (export_csv, 'text/csv; charset=utf-8'),
+    'json': (export_json, 'application/json'),
+}
+
+
+def shopping_list_response(rows, export_format):
+    """
+    Ответ с файлом списка покупок в формате txt, csv, json или xlsx.
+    rows — итератор кортежей (название, единица измерения, количество).
+    """
+    filename = f'{EXPORT_FILENAME}.{export_format}'
+    if export_format == 'xlsx':
+        return FileResponse(
+            export_xlsx(rows),
+            as_attachment=True,
+            filename=filename,
+            content_type=settings.EXTENSION_MIME_TYPE_XLSX,
+        )
+    generator, content_type = STREAM_EXPORTS[export_format]
+    response = StreamingHttpResponse(
+        generator(rows), content_type=content_type
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
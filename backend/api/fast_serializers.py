@@ -0,0 +1,176 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import models
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+
+from api.images import get_variant_urls
+from recipes.models import IngredientInRecipe, Recipe
+from users.models import Subscription
+
+User = get_user_model()
+
+RECIPE_VALUES = (
+    'id', 'author_id', 'name', 'image', 'image_variants_source', 'text',
+    'cooking_time', 'pub_date', 'is_favorited', 'is_in_shopping_cart',
+)
+AUTHOR_VALUES = (
+    'id', 'email', 'username', 'first_name', 'last_name', 'avatar',
+    'avatar_variants_source',
+)
+
+
+class RecipeValuesSerializer:
+    """
+    Быстрое чтение рецептов из строк values() без дерева полей DRF.
+    Формирует тот же JSON, что и RecipeReadSerializer.
+    """
+
+    def __init__(self, rows, context):
+        self.rows = list(rows)
+        self.request = context.get('request')
+
+    def _file_url(self, storage, name):
+        if not name:
+            return None
+        url = storage.url(name)
+        if self.request:
+            return self.request.build_absolute_uri(url)
+        return url
+
+    def _get_tags(self, recipe_ids):
+        tags = defaultdict(list)
+        rows = Recipe.tags.through.objects.filter(
+            recipe_id__in=recipe_ids
+        ).order_by('tag_id').values_list(
+            'recipe_id', 'tag_id', 'tag__name', 'tag__slug'
+        )
+        for recipe_id, tag_id, name, slug in rows:
+            tags[recipe_id].append({'id': tag_id, 'name': name, 'slug': slug})
+        return tags
+
+    def _get_ingredients(self, recipe_ids):
+        ingredients = defaultdict(list)
+        rows = IngredientInRecipe.objects.filter(
+            recipe_id__in=recipe_ids
+        ).order_by('id').values_list(
+            'recipe_id', 'ingredient_id', 'ingredient__name',
+            'ingredient__measurement_unit', 'amount'
+        )
+        for recipe_id, ingredient_id, name, unit, amount in rows:
+            ingredients[recipe_id].append({
+                'id': ingredient_id,
+                'name': name,
+                'measurement_unit': unit,
+                'amount': amount,
+            })
+        return ingredients
+
+    def _get_authors(self, author_ids):
+        user = getattr(self.request, 'user', None)
+        if user is not None and user.is_authenticated:
+            is_subscribed = models.Exists(
+                Subscription.objects.filter(
+                    user=user, author=models.OuterRef('pk')
+                )
+            )
+        else:
+            is_subscribed = models.Value(
+                False, output_field=models.BooleanField()
+            )
+        storage = User._meta.get_field('avatar').storage
+        authors = {}
+        rows = User.objects.filter(pk__in=author_ids).annotate(
+            is_subscribed=is_subscribed
+        ).values(*AUTHOR_VALUES, 'is_subscribed')
+        for row in rows:
+            authors[row['id']] = {
+                'id': row['id'],
+                'email': row['email'],
+                'username': row['username'],
+                'first_name': row['first_name'],
+                'last_name': row['last_name'],
+                'is_subscribed': row['is_subscribed'],
+                'avatar': self._file_url(storage, row['avatar']),
+                'avatar_variants': get_variant_urls(
+                    self.request, storage, row['avatar'],
+                    row['avatar_variants_source']
+                ),
+            }
+        return authors
+
+    @property
+    def data(self):
+        recipe_ids = [row['id'] for row in self.rows]
+        tags = self._get_tags(recipe_ids)
+        ingredients = self._get_ingredients(recipe_ids)
+        authors = self._get_authors({row['author_id'] for row in self.rows})
+        storage = Recipe._meta.get_field('image').storage
+        return [
+            {
+                'id': row['id'],
+                'tags': tags[row['id']],
+                'author': authors[row['author_id']],
+                'ingredients': ingredients[row['id']],
+                'is_favorited': row['is_favorited'],
+                'is_in_shopping_cart': row['is_in_shopping_cart'],
+                'name': row['name'],
+                'image': self._file_url(storage, row['image']),
+                'image_variants': get_variant_urls(
+                    self.request, storage, row['image'],
+                    row['image_variants_source']
+                ),
+                'text': row['text'],
+                'cooking_time': row['cooking_time'],
+            }
+            for row in self.rows
+        ]
+
+
+class RecipeValuesReadMixin:
+    """
+    Отдаёт list и retrieve через RecipeValuesSerializer,
+    если в настройках выбран RECIPE_READ_PIPELINE = 'values'.
+    """
+
+    def get_values_queryset(self):
+        # Курсору нужны значения всех полей порядка.
+        ordering = [
+            order.lstrip('-') for order in getattr(self, 'cursor_ordering', ())
+        ]
+        return self.filter_queryset(
+            self.get_queryset()
+        ).prefetch_related(None).values(
+            *RECIPE_VALUES, *(
+                field for field in ordering if field not in RECIPE_VALUES
+            )
+        )
+
+    def list(self, request, *args, **kwargs):
+        if settings.RECIPE_READ_PIPELINE != 'values':
+            return super().list(request, *args, **kwargs)
+        queryset = self.get_values_queryset()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = RecipeValuesSerializer(
+                page, context=self.get_serializer_context()
+            )
+            return self.get_paginated_response(serializer.data)
+        serializer = RecipeValuesSerializer(
+            queryset, context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        if settings.RECIPE_READ_PIPELINE != 'values':
+            return super().retrieve(request, *args, **kwargs)
+        row = get_object_or_404(
+            self.get_values_queryset(),
+            **{self.lookup_field: self.kwargs[self.lookup_field]}
+        )
+        serializer = RecipeValuesSerializer(
+            [row], context=self.get_serializer_context()
+        )
+        return Response(serializer.data[0])
@@ -1,18 +1,42 @@
 import django_filters
+from django.db import models
+from django_filters.widgets import BooleanWidget
 
-from recipes.models import Ingredient, Recipe
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart
+from recipes.search import get_search_backend
+
+# Порядки рецептов для ?ordering=, каждый обслуживается индексом.
+RECIPE_ORDERINGS = {
+    'newest': ('-pub_date', '-id'),
+    'popular': ('-popularity_score', '-id'),
+    'trending': ('-trending_score', '-id'),
+    'quickest': ('cooking_time', '-id'),
+}
 
 
 class RecipeFilter(django_filters.FilterSet):
-    """Фильтр рецептов по тегам, автору, избранному и списку покупок."""
+    """
+    Фильтр рецептов по тегам, автору, избранному, списку покупок
+    и полнотекстовому поиску, а также порядок рецептов. Связи
+    проверяются подзапросами EXISTS, поэтому JOIN не размножает
+    строки рецептов и DISTINCT не нужен.
+    """
+    search = django_filters.CharFilter(method='filter_search')
+    ordering = django_filters.ChoiceFilter(
+        method='filter_ordering',
+        choices=[(name, name) for name in RECIPE_ORDERINGS]
+    )
     tags = django_filters.CharFilter(method='filter_tags')
     is_favorited = django_filters.BooleanFilter(
-        method='filter_is_favorited'
+        method='filter_is_favorited', widget=BooleanWidget()
     )
     is_in_shopping_cart = django_filters.BooleanFilter(
-        method='filter_is_in_shopping_cart'
+        method='filter_is_in_shopping_cart', widget=BooleanWidget()
     )
     author = django_filters.NumberFilter(field_name='author__id')
+    # Применяются последними: поиск ограничивает выдачу среди уже
+    # отфильтрованных рецептов, а порядок заменяет релевантность.
+    last_filters = ('search', 'ordering')
 
     class Meta:
         model = Recipe
@@ -20,53 +44,66 @@ class RecipeFilter(django_filters.FilterSet):
             'tags',
             'author',
             'is_favorited',
-            'is_in_shopping_cart'
+            'is_in_shopping_cart',
+            'search',
+            'ordering',
         ]
 
+    def filter_queryset(self, queryset):
+        names = [
+            name for name in self.form.cleaned_data
+            if name not in self.last_filters
+        ] + [
+            name for name in self.last_filters
+            if name in self.form.cleaned_data
+        ]
+        for name in names:
+            queryset = self.filters[name].filter(
+                queryset, self.form.cleaned_data[name]
+            )
+        return queryset
+
     def filter_tags(self, queryset, name, value):
         """Фильтрует рецепты по списку тегов."""
         tag_slugs = self.request.query_params.getlist('tags')
         if tag_slugs:
-            return queryset.filter(
-                tags__slug__in=tag_slugs
-            ).distinct()
+            return queryset.filter(models.Exists(
+                Recipe.tags.through.objects.filter(
+                    recipe_id=models.OuterRef('pk'),
+                    tag__slug__in=tag_slugs
+                )
+            ))
         return queryset
 
-    def filter_is_favorited(self, queryset, name, value):
-        """Фильтрует рецепты, добавленные в избранное."""
-        if isinstance(value, str):
-            value = value == '1'
-        if value and self.request.user.is_authenticated:
-            return queryset.filter(
-                favorite_related__user=self.request.user
-            ).distinct()
-        return queryset
+    def filter_search(self, queryset, name, value):
+        """Поиск по названию и описанию, сначала самые релевантные."""
+        value = value.strip()
+        if not value:
+            return queryset
+        return get_search_backend().search(queryset, value)
 
-    def filter_is_in_shopping_cart(self, queryset, name, value):
-        """Фильтрует рецепты, добавленные в список покупок."""
+    def filter_ordering(self, queryset, name, value):
+        """Сортирует рецепты, заменяя порядок по релевантности поиска."""
+        return queryset.order_by(*RECIPE_ORDERINGS[value])
+
+    def filter_user_relation(self, queryset, model, value):
+        """Оставляет рецепты, связанные с текущим пользователем."""
         if value and self.request.user.is_authenticated:
-            return queryset.filter(
-                shoppingcart_related__user=self.request.user
-            )
+            return queryset.filter(models.Exists(
+                model.objects.filter(
+                    user=self.request.user,
+                    recipe_id=models.OuterRef('pk')
+                )
+            ))
         return queryset
 
-    def filter_queryset(self, queryset):
-        """Явно применяем фильтры в нужном порядке."""
-        queryset = super().filter_queryset(queryset)
-        is_fav = self.data.get('is_favorited') == '1'
-        is_in_cart = self.data.get('is_in_shopping_cart') == '1'
-
-        if is_fav and self.request.user.is_authenticated:
-            queryset = queryset.filter(
-                favorite_related__user=self.request.user
-            ).distinct()
-
-        if is_in_cart and self.request.user.is_authenticated:
-            queryset = queryset.filter(
-                shoppingcart_related__user=self.request.user
-            ).distinct()
+    def filter_is_favorited(self, queryset, name, value):
+        """Фильтрует рецепты, добавленные в избранное."""
+        return self.filter_user_relation(queryset, Favorite, value)
 
-        return queryset
+    def filter_is_in_shopping_cart(self, queryset, name, value):
+        """Фильтрует рецепты, добавленные в список покупок."""
+        return self.filter_user_relation(queryset, ShoppingCart, value)
 
 
 class IngredientSearchFilter(django_filters.FilterSet):
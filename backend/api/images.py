@@ -0,0 +1,169 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Имя варианта: (максимальная сторона, формат Pillow, расширение файла).
+IMAGE_VARIANTS = {
+    'capped': (1600, 'JPEG', 'jpg'),
+    'thumbnail': (400, 'JPEG', 'jpg'),
+    'webp': (1600, 'WEBP', 'webp'),
+}
+IMAGE_QUALITY = 85
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def variant_name(name, variant):
+    """
+    Детерминированное имя файла варианта:
+    recipes/<uuid>.png -> recipes/<uuid>_thumbnail.jpg.
+    """
+    root, _ = os.path.splitext(name)
+    return f'{root}_{variant}.{IMAGE_VARIANTS[variant][2]}'
+
+
+def _flatten(image):
+    """Переводит изображение в RGB, заливая прозрачность белым."""
+    if image.mode == 'RGB':
+        return image
+    image = image.convert('RGBA')
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def render_variants(content):
+    """
+    Строит варианты изображения из байтов исходного файла.
+    Выполняется в процессе пула, поэтому не обращается к Django.
+    """
+    with Image.open(BytesIO(content)) as source:
+        image = _flatten(ImageOps.exif_transpose(source))
+    results = {}
+    for variant, (size, image_format, _) in IMAGE_VARIANTS.items():
+        copy = image.copy()
+        copy.thumbnail((size, size), Image.LANCZOS)
+        buffer = BytesIO()
+        copy.save(buffer, image_format, quality=IMAGE_QUALITY, optimize=True)
+        results[variant] = buffer.getvalue()
+    return results
+
+
+def get_executor():
+    """Пул процессов, создаётся при первой загрузке изображения."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _executor
+
+
+def get_variant_urls(request, storage, name, source):
+    """
+    URL вариантов изображения или None, пока они не построены
+    (source хранит имя файла, для которого варианты готовы).
+    """
+    if not name or name != source:
+        return None
+    urls = {}
+    for variant in IMAGE_VARIANTS:
+        url = storage.url(variant_name(name, variant))
+        urls[variant] = request.build_absolute_uri(url) if request else url
+    return urls
+
+
+def delete_variants(storage, name):
+    """Удаляет файлы вариантов изображения."""
+    for variant in IMAGE_VARIANTS:
+        storage.delete(variant_name(name, variant))
+
+
+def discard_variants(instance, field, source, deleted=False):
+    """
+    После коммита удаляет варианты прежнего изображения (имя в поле
+    source), если изображение в поле field заменено или убрано,
+    либо объект удалён (deleted). У сохранённого объекта поле source
+    очищается.
+    """
+    stale = getattr(instance, source)
+    if not stale or (not deleted and stale == getattr(instance, field).name):
+        return
+    if not deleted:
+        type(instance)._default_manager.filter(
+            pk=instance.pk, **{source: stale}
+        ).update(**{source: ''})
+        setattr(instance, source, '')
+    storage = instance._meta.get_field(field).storage
+    transaction.on_commit(lambda: delete_variants(storage, stale))
+
+
+def _save_variants(model, pk, field, source, name, on_ready, future):
+    try:
+        variants = future.result()
+        storage = model._meta.get_field(field).storage
+        for variant, content in variants.items():
+            path = variant_name(name, variant)
+            storage.delete(path)
+            storage.save(path, ContentFile(content))
+        updated = model._default_manager.filter(
+            pk=pk, **{field: name}
+        ).update(**{source: name})
+        if not updated:
+            # Изображение заменили или объект удалили, пока строились
+            # варианты: они уже никому не нужны.
+            delete_variants(storage, name)
+        elif on_ready is not None:
+            on_ready()
+    except Exception:
+        logger.exception('Не удалось обработать изображение %s', name)
+    finally:
+        connections.close_all()
+
+
+def _submit(model, pk, field, source, name, on_ready):
+    storage = model._meta.get_field(field).storage
+    try:
+        with storage.open(name) as file:
+            content = file.read()
+        future = get_executor().submit(render_variants, content)
+    except Exception:
+        logger.exception('Не удалось отправить в обработку %s', name)
+        return
+    future.add_done_callback(
+        lambda done: _save_variants(
+            model, pk, field, source, name, on_ready, done
+        )
+    )
+
+
+def schedule_variants(instance, field, source, on_ready=None):
+    """
+    После коммита отправляет изображение из поля field в пул процессов.
+    Когда варианты сохранены, в поле source записывается имя исходного
+    файла и вызывается on_ready. Повторная обработка не запускается,
+    если варианты для текущего файла уже есть.
+    """
+    name = getattr(instance, field).name
+    if (
+        not settings.IMAGE_VARIANTS_ENABLED
+        or not name
+        or name == getattr(instance, source)
+    ):
+        return
+    transaction.on_commit(lambda: _submit(
+        type(instance), instance.pk, field, source, name, on_ready
+    ))
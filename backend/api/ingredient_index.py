@@ -0,0 +1,170 @@
+import json
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+from django.http import HttpResponse
+
+from api.cache import INGREDIENTS_VERSION, get_versions
+from api.constants import (
+    INGREDIENT_SEARCH_LIMIT,
+    INGREDIENT_SIMILARITY_THRESHOLD,
+    INGREDIENT_WORD_START_BOOST,
+)
+from recipes.models import Ingredient
+
+WORD_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Приводит название к виду для поиска: регистр и ё/е не важны."""
+    return text.casefold().replace('ё', 'е')
+
+
+def trigrams(text):
+    """
+    Множество триграмм нормализованного текста.
+    Как в pg_trgm, каждое слово дополняется двумя пробелами
+    в начале и одним в конце.
+    """
+    result = set()
+    for word in WORD_RE.findall(text):
+        padded = f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def render_json(fragments):
+    """Собирает JSON-массив из заранее сериализованных элементов."""
+    return b'[' + b','.join(fragments) + b']'
+
+
+class IngredientSnapshot:
+    """
+    Неизменяемый снимок каталога ингредиентов: отсортированные
+    нормализованные названия, параллельный список элементов ответа,
+    уже сериализованных в JSON (как у JSONRenderer DRF),
+    и инвертированный индекс триграмм для нечёткого поиска.
+    """
+
+    def __init__(self, version, rows):
+        self.version = version
+        rows = sorted(rows, key=lambda row: (normalize(row[1]), row[0]))
+        self.keys = [normalize(name) for _, name, _ in rows]
+        self.fragments = [
+            json.dumps(
+                {'id': pk, 'name': name, 'measurement_unit': unit},
+                ensure_ascii=False,
+                separators=(',', ':'),
+            ).encode()
+            for pk, name, unit in rows
+        ]
+        self.words = [WORD_RE.findall(key) for key in self.keys]
+        self.trigram_counts = []
+        self.postings = {}
+        for position, key in enumerate(self.keys):
+            grams = trigrams(key)
+            self.trigram_counts.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(position)
+
+    def prefix_range(self, prefix):
+        """Границы среза названий, начинающихся с prefix."""
+        if not prefix:
+            return 0, len(self.keys)
+        start = bisect_left(self.keys, prefix)
+        stop = bisect_left(
+            self.keys, prefix[:-1] + chr(ord(prefix[-1]) + 1), start
+        )
+        return start, stop
+
+    def search(self, prefix, limit=INGREDIENT_SEARCH_LIMIT):
+        """
+        Элементы, названия которых начинаются с prefix.
+        Точное совпадение названия идёт первым, остальные по алфавиту.
+        """
+        start, stop = self.prefix_range(normalize(prefix))
+        return self.fragments[start:min(stop, start + limit)]
+
+    def fuzzy_search(self, query, limit=INGREDIENT_SEARCH_LIMIT):
+        """
+        Нечёткий поиск с опечатками. Сходство считается как в pg_trgm:
+        доля общих триграмм запроса и названия. Если каждое слово
+        запроса является началом какого-то слова названия,
+        к сходству добавляется INGREDIENT_WORD_START_BOOST.
+        """
+        query = normalize(query)
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self.postings.get(gram, ()))
+        query_words = WORD_RE.findall(query)
+        scored = []
+        for position, common in shared.items():
+            score = common / (
+                len(query_grams) + self.trigram_counts[position] - common
+            )
+            if all(
+                any(word.startswith(part) for word in self.words[position])
+                for part in query_words
+            ):
+                score += INGREDIENT_WORD_START_BOOST
+            if score >= INGREDIENT_SIMILARITY_THRESHOLD:
+                scored.append((-score, position))
+        scored.sort()
+        return [self.fragments[position] for _, position in scored[:limit]]
+
+
+class IngredientIndex:
+    """
+    Индекс ингредиентов в памяти процесса.
+    Перестраивается при смене счётчика поколений ингредиентов,
+    поэтому изменения в админке и команда load видны сразу.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def get_snapshot(self):
+        version, = get_versions(INGREDIENTS_VERSION)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version != version:
+                self._snapshot = IngredientSnapshot(
+                    version,
+                    Ingredient.objects.values_list(
+                        'id', 'name', 'measurement_unit'
+                    ),
+                )
+            return self._snapshot
+
+
+ingredient_index = IngredientIndex()
+
+
+class IngredientIndexListMixin:
+    """
+    Отдаёт поиск ингредиентов по началу названия (?name=)
+    и нечёткий поиск (?q=) из индекса в памяти готовым JSON
+    без обращения к базе.
+    """
+
+    def list(self, request, *args, **kwargs):
+        params = request.query_params
+        if 'name' in params:
+            fragments = ingredient_index.get_snapshot().search(params['name'])
+        elif 'q' in params:
+            fragments = ingredient_index.get_snapshot().fuzzy_search(
+                params['q']
+            )
+        else:
+            return super().list(request, *args, **kwargs)
+        return HttpResponse(
+            render_json(fragments), content_type='application/json'
+        )
@@ -0,0 +1,184 @@
+import json
+import statistics
+import time
+from io import StringIO
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.datagen import DATASETS, generate_dataset
+from recipes.models import Recipe
+
+User = get_user_model()
+
+ENDPOINTS = (
+    ('recipes_list', '/api/recipes/', False),
+    ('recipes_list_tags', '/api/recipes/?tags=breakfast&tags=lunch', False),
+    ('recipes_favorited', '/api/recipes/?is_favorited=1', True),
+    ('recipes_in_cart', '/api/recipes/?is_in_shopping_cart=1', True),
+    ('recipe_detail', '/api/recipes/{recipe_id}/', True),
+    ('recipe_similar', '/api/recipes/{recipe_id}/similar/', False),
+    ('subscriptions', '/api/users/subscriptions/', True),
+    ('feed', '/api/recipes/feed/', True),
+    ('download_shopping_cart', '/api/recipes/download_shopping_cart/', True),
+    ('ingredients_search', '/api/ingredients/?name=мо', False),
+    ('pantry', '/api/recipes/pantry/?ingredients=1&ingredients=2', False),
+)
+
+
+class Command(BaseCommand):
+    """
+    Команда для замера производительности основных эндпоинтов API.
+    Создаёт отдельную тестовую базу, заполняет её детерминированным
+    набором данных и выводит результаты в JSON.
+    """
+
+    help = "Бенчмарк эндпоинтов API на сгенерированных данных"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dataset',
+            choices=DATASETS,
+            action='append',
+            help='Размер набора данных (можно указать несколько раз)'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Количество замеров на эндпоинт'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Зерно генератора данных'
+        )
+        parser.add_argument(
+            '--response-cache',
+            action='store_true',
+            help='Не отключать кеш ответов для анонимных запросов'
+        )
+        parser.add_argument(
+            '--output', help='Файл для JSON-результатов (по умолчанию stdout)'
+        )
+
+    @staticmethod
+    def fetch(client, url):
+        """
+        GET-запрос с чтением всего тела: у потоковых ответов
+        (выгрузка списка покупок) запросы к базе выполняются
+        только при чтении тела.
+        """
+        response = client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def measure(self, client, url, repeat):
+        """Время ответа (мс) и число SQL-запросов для url."""
+        response = self.fetch(client, url)
+        durations = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = self.fetch(client, url)
+                durations.append((time.perf_counter() - start) * 1000)
+        durations.sort()
+        return {
+            'status': response.status_code,
+            'queries': len(queries),
+            'min_ms': round(durations[0], 3),
+            'median_ms': round(statistics.median(durations), 3),
+            'mean_ms': round(statistics.mean(durations), 3),
+            'p95_ms': round(
+                durations[max(0, int(len(durations) * 0.95) - 1)], 3
+            ),
+            'max_ms': round(durations[-1], 3),
+        }
+
+    def measure_endpoints(self, user_ids, repeat):
+        """
+        Замеры всех ENDPOINTS: авторизованные запросы выполняются
+        от пользователя из user_ids с наибольшим числом подписок.
+        """
+        user = User.objects.filter(pk__in=user_ids).order_by(
+            '-following_count', 'pk'
+        ).first()
+        token, _ = Token.objects.get_or_create(user=user)
+        anonymous = APIClient()
+        authorized = APIClient()
+        authorized.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        recipe_id = Recipe.objects.order_by('-favorites_count', 'pk').first()
+        return {
+            endpoint: self.measure(
+                authorized if auth else anonymous,
+                url.format(recipe_id=recipe_id.pk),
+                repeat
+            )
+            for endpoint, url, auth in ENDPOINTS
+        }
+
+    def run_dataset(self, name, options):
+        start = time.perf_counter()
+        user_ids = generate_dataset(seed=options['seed'], **DATASETS[name])
+        call_command('rebuild_similar', stdout=StringIO())
+        seed_time = time.perf_counter() - start
+
+        results = self.measure_endpoints(user_ids, options['repeat'])
+        for endpoint, result in results.items():
+            self.stderr.write(
+                f'{name} {endpoint}: {result["median_ms"]} мс'
+            )
+        return {
+            'users': DATASETS[name]['users'],
+            'recipes': DATASETS[name]['recipes'],
+            'seed_seconds': round(seed_time, 3),
+            'endpoints': results,
+        }
+
+    def handle(self, *args, **options):
+        datasets = options['dataset'] or ['small']
+        report = {
+            'vendor': connection.vendor,
+            'django': django.get_version(),
+            'repeat': options['repeat'],
+            'seed': options['seed'],
+            'datasets': {},
+        }
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        try:
+            for name in datasets:
+                connection.creation.create_test_db(
+                    verbosity=0, autoclobber=True
+                )
+                try:
+                    call_command('load', stdout=StringIO())
+                    with override_settings(
+                        RESPONSE_CACHE_ENABLED=options['response_cache'],
+                        REQUEST_METRICS_SAMPLE_RATE=0,
+                    ):
+                        report['datasets'][name] = self.run_dataset(
+                            name, options
+                        )
+                finally:
+                    connection.creation.destroy_test_db(
+                        old_name, verbosity=0
+                    )
+        finally:
+            teardown_test_environment()
+
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    """Команда для вывода статистики кеша ответов API."""
+
+    help = "Статистика попаданий и промахов кеша ответов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Обнулить статистику после вывода'
+        )
+
+    def handle(self, *args, **options):
+        stats = get_stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total * 100 if total else 0
+        self.stdout.write(
+            f'Попаданий: {stats["hits"]}, промахов: {stats["misses"]}, '
+            f'доля попаданий: {ratio:.1f}%'
+        )
+        if options['reset']:
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS('✅ Статистика обнулена'))
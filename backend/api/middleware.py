@@ -0,0 +1,139 @@
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetrics:
+    """
+    Метрики одного запроса: число и время SQL-запросов,
+    время работы вьюхи и сериализации (рендеринга) ответа.
+    Экземпляр передаётся в connection.execute_wrapper.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.action = None
+        self.view_start = None
+        self.view_end = None
+        self.render_end = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+    def finish_render(self, response):
+        self.render_end = time.perf_counter()
+
+
+def get_action_name(view_func, request):
+    """Имя действия вьюсета вида RecipeViewSet.list."""
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return getattr(view_func, '__name__', None)
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(request.method.lower())
+    if action is None:
+        return view_class.__name__
+    return f'{view_class.__name__}.{action}'
+
+
+class RequestMetricsMiddleware:
+    """
+    Собирает метрики для выборки запросов (REQUEST_METRICS_SAMPLE_RATE)
+    и пишет их строкой в лог, а при REQUEST_METRICS_SERVER_TIMING
+    отдаёт в заголовке Server-Timing. У потоковых ответов запросы
+    считаются до конца отдачи тела, а заголовок не ставится:
+    к этому моменту заголовки уже отправлены.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.REQUEST_METRICS_SAMPLE_RATE:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        request._request_metrics = metrics
+        with connection.execute_wrapper(metrics):
+            response = self.get_response(request)
+        if response.streaming:
+            response.streaming_content = self.stream(
+                request, response, metrics, response.streaming_content
+            )
+            return response
+        total = time.perf_counter() - metrics.start
+        self.report(request, response, metrics, total)
+        return response
+
+    def stream(self, request, response, metrics, content):
+        """
+        Отдаёт тело потокового ответа, считая запросы к базе.
+        Метрики пишутся в лог, когда тело отдано или ответ закрыт.
+        """
+        try:
+            with connection.execute_wrapper(metrics):
+                yield from content
+        finally:
+            total = time.perf_counter() - metrics.start
+            self.report(request, response, metrics, total)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = getattr(request, '_request_metrics', None)
+        if metrics is None:
+            return None
+        metrics.action = get_action_name(view_func, request)
+        metrics.view_start = time.perf_counter()
+        return None
+
+    def process_template_response(self, request, response):
+        metrics = getattr(request, '_request_metrics', None)
+        if metrics is not None:
+            metrics.view_end = time.perf_counter()
+            response.add_post_render_callback(metrics.finish_render)
+        return response
+
+    def report(self, request, response, metrics, total):
+        timings = {'db': metrics.db_time, 'total': total}
+        if metrics.view_start is not None:
+            view_end = metrics.view_end or metrics.start + total
+            timings['view'] = view_end - metrics.view_start
+        if metrics.view_end is not None and metrics.render_end is not None:
+            timings['serialize'] = metrics.render_end - metrics.view_end
+        if response.streaming:
+            size = None
+        else:
+            size = len(response.content)
+            if settings.REQUEST_METRICS_SERVER_TIMING:
+                response['Server-Timing'] = ', '.join(
+                    f'{name};dur={value * 1000:.2f}'
+                    + (
+                        f';desc="{metrics.queries} queries"'
+                        if name == 'db' else ''
+                    )
+                    for name, value in timings.items()
+                )
+        logger.info(json.dumps({
+            'action': metrics.action,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'size': size,
+            **{
+                f'{name}_ms': round(value * 1000, 2)
+                for name, value in timings.items()
+            },
+        }))
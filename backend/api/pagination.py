@@ -1,9 +1,164 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from datetime import date
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    PageNumberPagination,
+)
 
 from api.constants import DEFAULT_PAGE_SIZE
 
 
-class CustomPaginator(PageNumberPagination):
-    """Пагинация с параметром limit и размером страницы по умолчанию 6."""
+class CursorPaginator(CursorPagination):
+    """
+    Курсорная (keyset) пагинация с параметром limit.
+    Порядок берётся из атрибута cursor_ordering вьюсета; последнее
+    поле порядка уникально (id). Курсор хранит значения всех полей
+    порядка, поэтому страницы не зависят от повторяющихся значений
+    первого поля (рейтинг, время приготовления) и не требуют OFFSET.
+    """
+    page_size_query_param = 'limit'
+    page_size = DEFAULT_PAGE_SIZE
+    ordering = ('-id',)
+
+    def get_ordering(self, request, queryset, view):
+        return getattr(view, 'cursor_ordering', self.ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = tuple(self.get_ordering(request, queryset, view))
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = None if self.cursor is None else self.cursor.position
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(
+                order[1:] if order.startswith('-') else f'-{order}'
+                for order in ordering
+            )
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(
+                self.after_position(ordering, self.decode_position(position))
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        following = (
+            self._get_position_from_instance(results[-1], self.ordering)
+            if len(results) > len(self.page) else None
+        )
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = following is not None
+            self.next_position = position
+            self.previous_position = following
+        else:
+            self.has_next = following is not None
+            self.has_previous = position is not None
+            self.next_position = following
+            self.previous_position = position
+        self.display_page_controls = self.has_previous or self.has_next
+        return self.page
+
+    def decode_position(self, position):
+        """Значения полей порядка из курсора."""
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    @staticmethod
+    def after_position(ordering, values):
+        """
+        Условие «строка идёт после values в порядке ordering»:
+        (a, b, id) > (x, y, z) раскрывается в a > x OR a = x AND
+        (b > y OR b = y AND id > z) с учётом направления полей.
+        """
+        condition = Q()
+        for order, value in zip(reversed(ordering), reversed(values)):
+            field = order.lstrip('-')
+            lookup = 'lt' if order.startswith('-') else 'gt'
+            step = Q(**{f'{field}__{lookup}': value})
+            condition = step if not condition else (
+                step | Q(**{field: value}) & condition
+            )
+        return condition
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            field = order.lstrip('-')
+            value = (
+                instance[field] if isinstance(instance, dict)
+                else getattr(instance, field)
+            )
+            values.append(
+                value.isoformat() if isinstance(value, date) else value
+            )
+        return json.dumps(values)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = (
+            self._get_position_from_instance(self.page[-1], self.ordering)
+            if self.page else self.next_position
+        )
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=position)
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = (
+            self._get_position_from_instance(self.page[0], self.ordering)
+            if self.page else self.previous_position
+        )
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=position)
+        )
+
+
+class PagePaginator(PageNumberPagination):
+    """
+    Постраничная пагинация с параметром limit и размером страницы
+    по умолчанию 6. Подходит и для списков, не только для querysets.
+    """
     page_size_query_param = 'limit'
     page_size = DEFAULT_PAGE_SIZE
+
+
+class CustomPaginator(PagePaginator):
+    """
+    Постраничная пагинация, которая при наличии параметра cursor
+    (в том числе пустого) переключается на курсорную пагинацию
+    без COUNT и OFFSET.
+    """
+    cursor_query_param = 'cursor'
+    cursor_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param in request.query_params:
+            self.cursor_paginator = CursorPaginator()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,142 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from django.conf import settings
+
+from api.cache import RECIPES_VERSION, TAGS_VERSION, get_versions
+from recipes.models import IngredientInRecipe, Recipe
+
+
+def _sorted_array(values):
+    return array('q', sorted(set(values)))
+
+
+class PantrySnapshot:
+    """
+    Снимок для поиска рецептов по имеющимся ингредиентам:
+    ингредиент -> отсортированный массив id рецептов, тег -> массив
+    id рецептов и параллельные массивы id рецептов, числа ингредиентов
+    и времени приготовления.
+    """
+
+    def __init__(self, version, recipe_rows, ingredient_rows, tag_rows):
+        self.version = version
+        self.built = time.monotonic()
+        recipes = sorted(recipe_rows)
+        self.recipe_ids = array('q', (row[0] for row in recipes))
+        self.cooking_times = array('l', (row[1] for row in recipes))
+        postings = defaultdict(list)
+        for recipe_id, ingredient_id in ingredient_rows:
+            postings[ingredient_id].append(recipe_id)
+        self.postings = {
+            ingredient_id: _sorted_array(recipe_ids)
+            for ingredient_id, recipe_ids in postings.items()
+        }
+        required = Counter()
+        for recipe_ids in self.postings.values():
+            required.update(recipe_ids)
+        self.required = array(
+            'l', (required[recipe_id] for recipe_id in self.recipe_ids)
+        )
+        tags = defaultdict(list)
+        for recipe_id, slug in tag_rows:
+            tags[slug].append(recipe_id)
+        self.tag_postings = {
+            slug: _sorted_array(recipe_ids)
+            for slug, recipe_ids in tags.items()
+        }
+
+    def _position(self, recipe_id):
+        position = bisect_left(self.recipe_ids, recipe_id)
+        if (
+            position < len(self.recipe_ids)
+            and self.recipe_ids[position] == recipe_id
+        ):
+            return position
+        return None
+
+    def search(
+        self, ingredients, tags=None, cooking_time=None, min_coverage=0
+    ):
+        """
+        Рецепты, в которых есть хотя бы один из ингредиентов (id),
+        в виде (id, доля имеющихся ингредиентов, сколько не хватает):
+        сначала с большей долей, затем с меньшим числом недостающих,
+        затем новые. tags — любой из слагов, cooking_time — не дольше.
+        """
+        matched = Counter()
+        for ingredient_id in set(ingredients):
+            matched.update(self.postings.get(ingredient_id, ()))
+        allowed = None
+        if tags:
+            allowed = set()
+            for slug in tags:
+                allowed.update(self.tag_postings.get(slug, ()))
+        results = []
+        for recipe_id, have in matched.items():
+            if allowed is not None and recipe_id not in allowed:
+                continue
+            position = self._position(recipe_id)
+            if position is None or (
+                cooking_time is not None
+                and self.cooking_times[position] > cooking_time
+            ):
+                continue
+            required = self.required[position]
+            coverage = have / required
+            if coverage >= min_coverage:
+                results.append((recipe_id, coverage, required - have))
+        results.sort(key=lambda item: (-item[1], item[2], -item[0]))
+        return results
+
+
+class PantryIndex:
+    """
+    Индекс ингредиентов рецептов в памяти процесса. Перестраивается
+    при смене счётчиков поколений рецептов и тегов, которые меняются
+    при любой записи рецепта, его ингредиентов или тегов, но не чаще
+    раза в PANTRY_INDEX_MAX_STALENESS секунд. Перестраивает один поток,
+    остальные запросы тем временем получают прежний снимок.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, snapshot, version):
+        return snapshot is not None and (
+            snapshot.version == version
+            or time.monotonic() - snapshot.built
+            < settings.PANTRY_INDEX_MAX_STALENESS
+        )
+
+    def get_snapshot(self):
+        version = tuple(get_versions(RECIPES_VERSION, TAGS_VERSION))
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot, version):
+            return snapshot
+        if not self._lock.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            if not self._is_fresh(self._snapshot, version):
+                self._snapshot = PantrySnapshot(
+                    version,
+                    Recipe.objects.values_list(
+                        'id', 'cooking_time'
+                    ).order_by().iterator(),
+                    IngredientInRecipe.objects.values_list(
+                        'recipe_id', 'ingredient_id'
+                    ).order_by().iterator(),
+                    Recipe.tags.through.objects.values_list(
+                        'recipe_id', 'tag__slug'
+                    ).order_by().iterator(),
+                )
+            return self._snapshot
+        finally:
+            self._lock.release()
+
+
+pantry_index = PantryIndex()
@@ -0,0 +1,71 @@
+import gzip
+import re
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+
+from api.cache import get_versions
+
+ACCEPTS_GZIP_RE = re.compile(r'\bgzip\b')
+
+
+class PrecomputedBody:
+    """Тело ответа для одной версии данных: JSON и его gzip-версия."""
+
+    def __init__(self, versions, content):
+        self.versions = versions
+        self.content = content
+        self.gzipped = gzip.compress(content, mtime=0)
+
+
+class PrecomputedListMixin:
+    """
+    Отдаёт list без параметров запроса из памяти процесса:
+    JSON рендерится и сжимается один раз для каждой версии данных
+    (condition_versions), которые меняются сигналами при сохранении
+    объектов и после команды load.
+    """
+    _precomputed = {}
+    _precomputed_lock = threading.Lock()
+
+    def get_precomputed_body(self):
+        versions = get_versions(*self.condition_versions)
+        key = type(self).__name__
+        body = self._precomputed.get(key)
+        if body is not None and body.versions == versions:
+            return body
+        with self._precomputed_lock:
+            body = self._precomputed.get(key)
+            if body is None or body.versions != versions:
+                serializer = self.get_serializer(
+                    self.get_queryset(), many=True
+                )
+                body = PrecomputedBody(
+                    versions, JSONRenderer().render(serializer.data)
+                )
+                self._precomputed[key] = body
+            return body
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params or request.accepted_renderer.format != 'json':
+            return super().list(request, *args, **kwargs)
+        body = self.get_precomputed_body()
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if ACCEPTS_GZIP_RE.search(accept_encoding):
+            response = HttpResponse(
+                body.gzipped, content_type='application/json'
+            )
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(
+                body.content, content_type='application/json'
+            )
+        patch_vary_headers(response, ('Accept-Encoding',))
+        patch_cache_control(
+            response, public=True,
+            max_age=settings.PRECOMPUTED_RESPONSE_MAX_AGE
+        )
+        return response
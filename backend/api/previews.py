@@ -0,0 +1,53 @@
+from django.db.models import F, Prefetch, Window, prefetch_related_objects
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
+
+from api.constants import DEFAULT_RECIPES_LIMIT
+from recipes.models import Recipe
+
+
+def get_recipes_limit(request):
+    """Параметр recipes_limit, по умолчанию DEFAULT_RECIPES_LIMIT."""
+    try:
+        return max(int(request.query_params['recipes_limit']), 0)
+    except (KeyError, ValueError):
+        return DEFAULT_RECIPES_LIMIT
+
+
+def latest_recipes(author_ids, limit):
+    """
+    Не больше limit последних рецептов каждого автора.
+    Номер рецепта внутри автора считается ROW_NUMBER() OVER
+    (PARTITION BY author_id ORDER BY pub_date DESC), поэтому в память
+    попадают только нужные строки, а не все рецепты авторов.
+    """
+    ranked = Recipe.objects.filter(author_id__in=author_ids).annotate(
+        row_number=Window(
+            expression=RowNumber(),
+            partition_by=[F('author_id')],
+            order_by=[F('pub_date').desc(), F('id').desc()],
+        )
+    ).order_by().values('id', 'row_number')
+    sql, params = ranked.query.sql_with_params()
+    return Recipe.objects.filter(pk__in=RawSQL(
+        f'SELECT ranked.id FROM ({sql}) ranked '
+        'WHERE ranked.row_number <= %s',
+        (*params, limit)
+    )).only(
+        'id', 'author_id', 'name', 'image', 'image_variants_source',
+        'cooking_time', 'pub_date'
+    ).order_by('-pub_date', '-id')
+
+
+def prefetch_recipes_preview(authors, limit):
+    """
+    Загружает в authors[i].recipes превью рецептов для
+    SubscriptionUserSerializer. Вызывается для уже выбранной
+    страницы авторов.
+    """
+    authors = list(authors)
+    prefetch_related_objects(authors, Prefetch(
+        'recipes',
+        queryset=latest_recipes([author.pk for author in authors], limit)
+    ))
+    return authors
@@ -0,0 +1,27 @@
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+
+
+class ExportRenderer(JSONRenderer):
+    """
+    Рендерер формата выгрузки. Нужен, чтобы DRF принимал ?format=
+    и заголовок Accept: сам файл отдаётся потоком из вьюхи,
+    а через рендерер проходят только ответы с ошибками.
+    """
+    charset = 'utf-8'
+
+
+class TextExportRenderer(ExportRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+
+class CSVExportRenderer(ExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class XLSXExportRenderer(ExportRenderer):
+    media_type = settings.EXTENSION_MIME_TYPE_XLSX
+    format = 'xlsx'
+    charset = None
@@ -5,10 +5,13 @@ import uuid
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.core.files.base import ContentFile
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
+from api.constants import BATCH_MAX_SIZE, PANTRY_MAX_INGREDIENTS
+from api.images import get_variant_urls
 from recipes.models import (
     Favorite,
     Ingredient,
@@ -17,6 +20,9 @@ from recipes.models import (
     ShoppingCart,
     Tag,
 )
+from recipes.shopping_list import sync_recipe_ingredients
+from recipes.signals import muted_signals
+from recipes.similarity import queue_similar_refresh
 from users.models import Subscription
 
 User = get_user_model()
@@ -60,12 +66,13 @@ class UserSerializer(serializers.ModelSerializer):
     """Сериализатор для пользователя с подписками и аватаром."""
     is_subscribed = serializers.SerializerMethodField()
     avatar = serializers.SerializerMethodField()
+    avatar_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         fields = (
             'id', 'email', 'username', 'first_name',
-            'last_name', 'is_subscribed', 'avatar'
+            'last_name', 'is_subscribed', 'avatar', 'avatar_variants'
         )
 
         extra_kwargs = {
@@ -74,8 +81,10 @@ class UserSerializer(serializers.ModelSerializer):
 
     def get_is_subscribed(self, obj):
         """Возвращает True, если текущий пользователь подписан на obj."""
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
-        if not request or request.user.is_anonymous:
+        if not request or request.user.is_anonymous or request.user == obj:
             return False
         return Subscription.objects.filter(
             user=request.user, author=obj
@@ -88,6 +97,13 @@ class UserSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.avatar.url)
         return None
 
+    def get_avatar_variants(self, obj):
+        """URL уменьшенных вариантов аватара, когда они готовы."""
+        return get_variant_urls(
+            self.context.get('request'), obj.avatar.storage,
+            obj.avatar.name, obj.avatar_variants_source
+        )
+
 
 class UserCreateSerializer(serializers.ModelSerializer):
     """Сериализатор для подписки пользователя на автора."""
@@ -141,10 +157,11 @@ class SubscriptionSerializer(serializers.ModelSerializer):
 class RecipeShortSerializer(serializers.ModelSerializer):
     """Короткое представление рецепта для вложенных ответов."""
     image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
 
     def get_image(self, obj):
         """Возвращает полный URL изображения рецепта."""
@@ -153,21 +170,32 @@ class RecipeShortSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.image.url)
         return None
 
+    def get_image_variants(self, obj):
+        """URL уменьшенных вариантов изображения, когда они готовы."""
+        return get_variant_urls(
+            self.context.get('request'), obj.image.storage,
+            obj.image.name, obj.image_variants_source
+        )
+
 
 class SubscriptionUserSerializer(serializers.ModelSerializer):
     """Пользователь с рецептами и количеством подписок."""
     recipes = RecipeShortSerializer(many=True, read_only=True)
     is_subscribed = serializers.SerializerMethodField()
     recipes_count = serializers.IntegerField(read_only=True)
+    avatar_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         fields = (
             'id', 'email', 'username', 'first_name', 'last_name',
-            'is_subscribed', 'recipes', 'recipes_count', 'avatar'
+            'is_subscribed', 'recipes', 'recipes_count', 'avatar',
+            'avatar_variants'
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
@@ -176,6 +204,12 @@ class SubscriptionUserSerializer(serializers.ModelSerializer):
             author=obj
         ).exists()
 
+    def get_avatar_variants(self, obj):
+        return get_variant_urls(
+            self.context.get('request'), obj.avatar.storage,
+            obj.avatar.name, obj.avatar_variants_source
+        )
+
 
 class TagSerializer(serializers.ModelSerializer):
     """Сериализатор тега."""
@@ -224,16 +258,20 @@ class RecipeReadSerializer(serializers.ModelSerializer):
     author = UserSerializer()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
         fields = (
             'id', 'tags', 'author', 'ingredients', 'is_favorited',
-            'is_in_shopping_cart', 'name', 'image', 'text', 'cooking_time'
+            'is_in_shopping_cart', 'name', 'image', 'image_variants',
+            'text', 'cooking_time'
         )
 
     def get_is_favorited(self, obj):
         """True, если рецепт в избранном у текущего пользователя."""
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
@@ -241,11 +279,20 @@ class RecipeReadSerializer(serializers.ModelSerializer):
 
     def get_is_in_shopping_cart(self, obj):
         """True, если рецепт в списке покупок у текущего пользователя."""
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
         return obj.shoppingcart_related.filter(user=request.user).exists()
 
+    def get_image_variants(self, obj):
+        """URL уменьшенных вариантов изображения, когда они готовы."""
+        return get_variant_urls(
+            self.context.get('request'), obj.image.storage,
+            obj.image.name, obj.image_variants_source
+        )
+
 
 class RecipeWriteSerializer(serializers.ModelSerializer):
     """
@@ -321,15 +368,66 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         return data
 
     def create_ingredients(self, recipe, ingredients_data):
-        """Создаёт связь рецепта с ингредиентами."""
-        for item in ingredients_data:
-            ingredient = get_object_or_404(Ingredient, id=item['id'])
-            IngredientInRecipe.objects.create(
+        """
+        Создаёт связь рецепта с ингредиентами одним запросом.
+        Существование ингредиентов уже проверено в validate.
+        """
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(
                 recipe=recipe,
-                ingredient=ingredient,
+                ingredient_id=item['id'],
                 amount=item['amount']
             )
+            for item in ingredients_data
+        )
+
+    def update_ingredients(self, recipe, ingredients_data):
+        """
+        Приводит ингредиенты рецепта к новому списку:
+        добавляет новые, меняет количество у изменённых
+        и удаляет убранные, не трогая остальные строки.
+        """
+        amounts = {item['id']: item['amount'] for item in ingredients_data}
+        existing = {
+            row.ingredient_id: row
+            for row in IngredientInRecipe.objects.filter(recipe=recipe)
+        }
+        removed = [
+            ingredient_id for ingredient_id in existing
+            if ingredient_id not in amounts
+        ]
+        if removed:
+            with muted_signals(IngredientInRecipe):
+                IngredientInRecipe.objects.filter(
+                    recipe=recipe, ingredient_id__in=removed
+                ).delete()
+
+        changed = []
+        for ingredient_id, row in existing.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and row.amount != amount:
+                row.amount = amount
+                changed.append(row)
+        if changed:
+            IngredientInRecipe.objects.bulk_update(changed, ['amount'])
+
+        created = [
+            item for item in ingredients_data if item['id'] not in existing
+        ]
+        self.create_ingredients(recipe, created)
+        # bulk-операции и удаление с muted_signals не запускают
+        # обработчики, списки покупок пересчитываются одним вызовом.
+        sync_recipe_ingredients(
+            [recipe.pk],
+            removed
+            + [row.ingredient_id for row in changed]
+            + [item['id'] for item in created]
+        )
+        # Похожие рецепты зависят только от состава, не от количества.
+        if removed or created:
+            queue_similar_refresh([recipe.pk])
 
+    @transaction.atomic
     def create(self, validated_data):
         """Создаёт новый рецепт."""
         ingredients_data = validated_data.pop('ingredients')
@@ -338,12 +436,24 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         validated_data.pop('author', None)
 
         recipe = Recipe.objects.create(author=author, **validated_data)
-        recipe.tags.set(tags)
+        # У нового рецепта нет тегов, поэтому связи вставляются одним
+        # запросом без сверки tags.set; кеш сбросил сигнал Recipe.
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe=recipe, tag=tag) for tag in tags
+        )
         self.create_ingredients(recipe, ingredients_data)
+        queue_similar_refresh([recipe.pk])
+        # Новый рецепт ещё никто не добавил в избранное и покупки.
+        recipe.is_favorited = recipe.is_in_shopping_cart = False
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        """Обновляет существующий рецепт."""
+        """
+        Обновляет существующий рецепт.
+        Теги и ингредиенты меняются по разнице со старыми значениями
+        (tags.set сам добавляет и удаляет только отличающиеся связи).
+        """
         tags_data = validated_data.pop('tags', None)
         ingredients_data = validated_data.pop('ingredients', None)
 
@@ -353,13 +463,26 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             instance.tags.set(tags_data)
 
         if ingredients_data is not None:
-            instance.ingredientinrecipe_set.all().delete()
-            self.create_ingredients(instance, ingredients_data)
+            self.update_ingredients(instance, ingredients_data)
 
         return instance
 
     def to_representation(self, instance):
-        """Возвращает сериализованные данные для чтения."""
+        """
+        Возвращает сериализованные данные для чтения.
+        Теги и ингредиенты загружаются двумя запросами,
+        а не запросом на каждый ингредиент.
+        """
+        prefetch_related_objects(
+            [instance],
+            Prefetch('tags', queryset=Tag.objects.order_by('id')),
+            Prefetch(
+                'ingredientinrecipe_set',
+                queryset=IngredientInRecipe.objects.select_related(
+                    'ingredient'
+                ).order_by('id')
+            ),
+        )
         return RecipeReadSerializer(instance, context=self.context).data
 
 
@@ -389,6 +512,34 @@ class ShoppingCartSerializer(BaseUserRecipeSerializer):
         model = ShoppingCart
 
 
+class BatchIdsSerializer(serializers.Serializer):
+    """Список id для пакетных операций, повторы отбрасываются."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BATCH_MAX_SIZE
+    )
+
+    def validate_ids(self, value):
+        return list(dict.fromkeys(value))
+
+
+class PantryQuerySerializer(serializers.Serializer):
+    """Параметры поиска рецептов по имеющимся ингредиентам."""
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=PANTRY_MAX_INGREDIENTS
+    )
+    tags = serializers.ListField(
+        child=serializers.SlugField(), required=False
+    )
+    cooking_time = serializers.IntegerField(min_value=1, required=False)
+    min_coverage = serializers.FloatField(
+        min_value=0, max_value=1, default=0
+    )
+
+
 class AvatarSerializer(serializers.ModelSerializer):
     """Сериализатор для загрузки и удаления аватара пользователя."""
     avatar = Base64ImageField(
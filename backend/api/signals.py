@@ -0,0 +1,149 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api.cache import (
+    CATALOG_VERSION,
+    INGREDIENTS_VERSION,
+    RECIPE_VERSION,
+    RECIPES_VERSION,
+    TAGS_VERSION,
+    USER_VERSION,
+    bump_version,
+)
+from api.images import discard_variants, schedule_variants
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    IngredientInRecipe,
+    Recipe,
+    ShoppingCart,
+    Tag,
+)
+from recipes.signals import is_muted
+from users.models import Subscription
+
+User = get_user_model()
+
+
+def _bump_on_commit(*names):
+    transaction.on_commit(lambda: bump_version(*names))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe(sender, instance, **kwargs):
+    """Сбрасывает кеш списка рецептов и самого рецепта."""
+    _bump_on_commit(RECIPES_VERSION, RECIPE_VERSION.format(instance.pk))
+
+
+@receiver(post_save, sender=IngredientInRecipe)
+@receiver(post_delete, sender=IngredientInRecipe)
+def invalidate_recipe_ingredients(sender, instance, **kwargs):
+    """
+    Сбрасывает кеш рецепта при изменении его ингредиентов.
+    Пакетное изменение из сериализатора сохраняет сам рецепт,
+    и кеш сбрасывается сигналом рецепта.
+    """
+    if is_muted(sender):
+        return
+    _bump_on_commit(
+        RECIPES_VERSION, RECIPE_VERSION.format(instance.recipe_id)
+    )
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags(sender, instance, action, reverse, **kwargs):
+    """Сбрасывает кеш рецепта при изменении его тегов."""
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        _bump_on_commit(CATALOG_VERSION)
+    else:
+        _bump_on_commit(RECIPES_VERSION, RECIPE_VERSION.format(instance.pk))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tags(sender, **kwargs):
+    """Сбрасывает кеш тегов и всех ответов с рецептами."""
+    _bump_on_commit(CATALOG_VERSION, TAGS_VERSION)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredients(sender, **kwargs):
+    """Сбрасывает кеш ингредиентов и всех ответов с рецептами."""
+    _bump_on_commit(CATALOG_VERSION, INGREDIENTS_VERSION)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def invalidate_user_relations(sender, instance, **kwargs):
+    """
+    Меняет версию данных пользователя: от избранного, списка покупок
+    и подписок зависят его ответы с рецептами. Пакетные операции
+    (muted_signals) меняют версию сами.
+    """
+    if is_muted(sender):
+        return
+    _bump_on_commit(USER_VERSION.format(instance.user_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_author(sender, created=False, update_fields=None, **kwargs):
+    """
+    Сбрасывает все закешированные ответы при изменении пользователя.
+    Регистрация и обновление времени входа на ответы не влияют.
+    """
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    _bump_on_commit(CATALOG_VERSION)
+
+
+@receiver(post_save, sender=Recipe)
+def process_recipe_image(sender, instance, **kwargs):
+    """
+    Удаляет варианты заменённого изображения рецепта и запускает
+    построение вариантов нового.
+    """
+    discard_variants(instance, 'image', 'image_variants_source')
+    schedule_variants(
+        instance, 'image', 'image_variants_source',
+        on_ready=lambda: bump_version(
+            RECIPES_VERSION, RECIPE_VERSION.format(instance.pk)
+        )
+    )
+
+
+@receiver(post_save, sender=User)
+def process_avatar(sender, instance, **kwargs):
+    """
+    Удаляет варианты заменённого или убранного аватара и запускает
+    построение вариантов нового.
+    """
+    discard_variants(instance, 'avatar', 'avatar_variants_source')
+    schedule_variants(
+        instance, 'avatar', 'avatar_variants_source',
+        on_ready=lambda: bump_version(CATALOG_VERSION)
+    )
+
+
+@receiver(post_delete, sender=Recipe)
+def delete_recipe_image_variants(sender, instance, **kwargs):
+    discard_variants(
+        instance, 'image', 'image_variants_source', deleted=True
+    )
+
+
+@receiver(post_delete, sender=User)
+def delete_avatar_variants(sender, instance, **kwargs):
+    discard_variants(
+        instance, 'avatar', 'avatar_variants_source', deleted=True
+    )
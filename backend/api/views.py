@@ -1,21 +1,45 @@
-from django.db import models
-from django.db.models import F, Sum
-from django.http import HttpResponse
+from django.db import models, transaction
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
-from api.filters import IngredientSearchFilter, RecipeFilter
-from api.pagination import CustomPaginator
+from api.cache import (
+    INGREDIENTS_VERSION,
+    TAGS_VERSION,
+    USER_VERSION,
+    AnonymousResponseCacheMixin,
+    ConditionalGetMixin,
+    bump_version,
+)
+from api.fast_serializers import RecipeValuesReadMixin
+from api.exports import shopping_list_response
+from api.filters import (
+    RECIPE_ORDERINGS,
+    IngredientSearchFilter,
+    RecipeFilter,
+)
+from api.ingredient_index import IngredientIndexListMixin
+from api.pagination import CursorPaginator, CustomPaginator, PagePaginator
+from api.pantry import pantry_index
+from api.precomputed import PrecomputedListMixin
+from api.previews import get_recipes_limit, prefetch_recipes_preview
+from api.renderers import (
+    CSVExportRenderer,
+    TextExportRenderer,
+    XLSXExportRenderer,
+)
 from api.permissions import IsAuthorOrReadOnly, IsSelfOrReadOnly
 from api.serializers import (
     AvatarSerializer,
+    BatchIdsSerializer,
     FavoriteSerializer,
     IngredientSerializer,
+    PantryQuerySerializer,
     PasswordChangeSerializer,
     RecipeReadSerializer,
     RecipeShortSerializer,
@@ -33,9 +57,46 @@ from recipes.models import (
     IngredientInRecipe,
     Recipe,
     ShoppingCart,
+    SimilarRecipe,
     Tag,
 )
+from recipes.feed import feed_queryset
+from recipes.shopping_list import shopping_list_rows
+from recipes.signals import muted_signals, user_recipes_changed
 from users.models import Subscription, User
+from users.signals import subscriptions_changed
+
+
+def batch_results(ids, found, changed, done, skipped):
+    """Статусы пакетной операции для каждого переданного id."""
+    return {'results': [
+        {
+            'id': pk,
+            'status': (
+                done if pk in changed
+                else skipped if pk in found
+                else 'not_found'
+            ),
+        }
+        for pk in ids
+    ]}
+
+
+def lock_user(user):
+    """
+    Блокирует строку пользователя до конца транзакции: его изменения
+    избранного, списка покупок и подписок выполняются по очереди,
+    и прочитанные перед записью связи остаются актуальными.
+    """
+    list(User.objects.select_for_update().filter(
+        pk=user.pk
+    ).values_list('pk', flat=True))
+
+
+def bump_user_version_on_commit(user):
+    transaction.on_commit(
+        lambda: bump_version(USER_VERSION.format(user.pk))
+    )
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -43,6 +104,7 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all().order_by('id')
     serializer_class = UserSerializer
     pagination_class = CustomPaginator
+    cursor_ordering = ('id',)
     permission_classes = [IsSelfOrReadOnly]
 
     def get_serializer_class(self):
@@ -93,9 +155,8 @@ class UserViewSet(viewsets.ModelViewSet):
 
         elif request.method == 'DELETE':
             if user.avatar:
+                # Варианты аватара удаляет сигнал сохранения.
                 user.avatar.delete()
-                user.avatar = None
-                user.save()
             return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -110,29 +171,79 @@ class UserViewSet(viewsets.ModelViewSet):
         """
         user = request.user
         authors = User.objects.filter(
-            following__user=user
+            followers__user=user
         ).annotate(
-            recipes_count=models.Count('recipes', distinct=True),
             is_subscribed=models.Exists(
                 Subscription.objects.filter(
                     user=user,
                     author=models.OuterRef('pk')
                 )
             )
-        ).prefetch_related('recipes')
+        ).order_by('id')
+        recipes_limit = get_recipes_limit(request)
 
         page = self.paginate_queryset(authors)
         if page is not None:
             serializer = SubscriptionUserSerializer(
-                page, many=True, context={'request': request}
+                prefetch_recipes_preview(page, recipes_limit),
+                many=True,
+                context={'request': request}
             )
             return self.get_paginated_response(serializer.data)
 
         serializer = SubscriptionUserSerializer(
-            authors, many=True, context={'request': request}
+            prefetch_recipes_preview(authors, recipes_limit),
+            many=True,
+            context={'request': request}
         )
         return Response(serializer.data)
 
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        permission_classes=[IsAuthenticated],
+        url_path='subscribe/batch'
+    )
+    def subscribe_batch(self, request):
+        """
+        Подписаться на авторов или отписаться от них пакетом:
+        {"ids": [...]}. Статусы: created/exists или deleted/absent,
+        not_found для несуществующих пользователей и себя самого.
+        """
+        serializer = BatchIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        user = request.user
+        found = set(User.objects.filter(pk__in=ids).exclude(
+            pk=user.pk
+        ).values_list('pk', flat=True))
+        subscriptions = Subscription.objects.filter(
+            user=user, author_id__in=found
+        )
+        with transaction.atomic():
+            lock_user(user)
+            current = set(subscriptions.values_list('author_id', flat=True))
+            if request.method == 'POST':
+                changed = [pk for pk in ids if pk in found - current]
+                Subscription.objects.bulk_create(
+                    [Subscription(user=user, author_id=pk) for pk in changed],
+                    ignore_conflicts=True
+                )
+                delta, done, skipped = 1, 'created', 'exists'
+            else:
+                changed = [pk for pk in ids if pk in current]
+                # Без обработчиков сигналов: производные данные
+                # обновляются ниже одним вызовом на всю пачку.
+                with muted_signals(Subscription):
+                    subscriptions.filter(author_id__in=changed).delete()
+                delta, done, skipped = -1, 'deleted', 'absent'
+            if changed:
+                subscriptions_changed(user.pk, changed, delta)
+                bump_user_version_on_commit(user)
+        return Response(
+            batch_results(ids, found, set(changed), done, skipped)
+        )
+
     @action(
         detail=True,
         methods=['post', 'delete'],
@@ -160,10 +271,11 @@ class UserViewSet(viewsets.ModelViewSet):
                 context={'request': request}
             )
             if serializer.is_valid():
-                serializer.save()
+                with transaction.atomic():
+                    lock_user(user)
+                    serializer.save()
                 # Аннотируем автора
                 annotated_author = User.objects.annotate(
-                    recipes_count=models.Count('recipes', distinct=True),
                     is_subscribed=models.Exists(
                         Subscription.objects.filter(
                             user=user,
@@ -171,6 +283,9 @@ class UserViewSet(viewsets.ModelViewSet):
                         )
                     )
                 ).get(pk=author.pk)
+                prefetch_recipes_preview(
+                    [annotated_author], get_recipes_limit(request)
+                )
                 response_serializer = SubscriptionUserSerializer(
                     annotated_author,
                     context={'request': request}
@@ -185,10 +300,12 @@ class UserViewSet(viewsets.ModelViewSet):
             )
 
         elif request.method == 'DELETE':
-            deleted, _ = Subscription.objects.filter(
-                user=user,
-                author=author
-            ).delete()
+            with transaction.atomic():
+                lock_user(user)
+                deleted, _ = Subscription.objects.filter(
+                    user=user,
+                    author=author
+                ).delete()
             if not deleted:
                 return Response(
                     {'errors': 'Вы не были подписаны на этого пользователя'},
@@ -217,15 +334,28 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(
+    ConditionalGetMixin,
+    PrecomputedListMixin,
+    viewsets.ReadOnlyModelViewSet
+):
     """Вьюсет для тегов."""
+    condition_versions = (TAGS_VERSION,)
+    condition_per_user = False
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(
+    ConditionalGetMixin,
+    IngredientIndexListMixin,
+    PrecomputedListMixin,
+    viewsets.ReadOnlyModelViewSet
+):
     """Вьюсет для ингредиентов."""
+    condition_versions = (INGREDIENTS_VERSION,)
+    condition_per_user = False
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filter_backends = [DjangoFilterBackend]
@@ -233,7 +363,12 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     pagination_class = None
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    ConditionalGetMixin,
+    AnonymousResponseCacheMixin,
+    RecipeValuesReadMixin,
+    viewsets.ModelViewSet
+):
     """Вьюсет для рецептов."""
     queryset = Recipe.objects.all().order_by('-id')
     serializer_class = RecipeReadSerializer
@@ -242,6 +377,63 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend]
     permission_classes = [IsAuthorOrReadOnly]
 
+    def get_queryset(self):
+        """
+        Рецепты с аннотациями статусов текущего пользователя
+        и предзагрузкой связанных объектов.
+        Число запросов не зависит от размера страницы.
+        """
+        user = self.request.user
+        if user.is_authenticated:
+            is_favorited = models.Exists(
+                Favorite.objects.filter(
+                    user=user, recipe=models.OuterRef('pk')
+                )
+            )
+            is_in_shopping_cart = models.Exists(
+                ShoppingCart.objects.filter(
+                    user=user, recipe=models.OuterRef('pk')
+                )
+            )
+            is_subscribed = models.Exists(
+                Subscription.objects.filter(
+                    user=user, author=models.OuterRef('pk')
+                )
+            )
+        else:
+            is_favorited = is_in_shopping_cart = is_subscribed = models.Value(
+                False, output_field=models.BooleanField()
+            )
+        queryset = super().get_queryset().annotate(
+            is_favorited=is_favorited,
+            is_in_shopping_cart=is_in_shopping_cart,
+        )
+        if self.action in ('update', 'partial_update', 'destroy'):
+            # Изменяет рецепт только автор; теги и ингредиенты после
+            # записи всё равно перечитывает to_representation.
+            return queryset.select_related('author')
+        return queryset.prefetch_related(
+            models.Prefetch(
+                'author',
+                queryset=User.objects.annotate(is_subscribed=is_subscribed)
+            ),
+            models.Prefetch('tags', queryset=Tag.objects.order_by('id')),
+            models.Prefetch(
+                'ingredientinrecipe_set',
+                queryset=IngredientInRecipe.objects.select_related(
+                    'ingredient'
+                ).order_by('id')
+            ),
+        )
+
+    @property
+    def cursor_ordering(self):
+        """Курсорная пагинация идёт в порядке параметра ordering."""
+        return RECIPE_ORDERINGS.get(
+            self.request.query_params.get('ordering'),
+            RECIPE_ORDERINGS['newest']
+        )
+
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return RecipeWriteSerializer
@@ -261,7 +453,9 @@ class RecipeViewSet(viewsets.ModelViewSet):
             context={'request': request}
         )
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                lock_user(request.user)
+                serializer.save()
             response_serializer = RecipeShortSerializer(
                 recipe,
                 context={'request': request}
@@ -278,11 +472,71 @@ class RecipeViewSet(viewsets.ModelViewSet):
             - False, если не был найден
         """
         recipe = get_object_or_404(Recipe, pk=pk)
-        deleted, _ = model.objects.filter(
-            user=request.user, recipe=recipe
-        ).delete()
+        with transaction.atomic():
+            lock_user(request.user)
+            deleted, _ = model.objects.filter(
+                user=request.user, recipe=recipe
+            ).delete()
         return deleted > 0
 
+    @staticmethod
+    def _batch_user_recipes(model, request):
+        """
+        Пакетно добавляет рецепты в список (избранное, корзина)
+        или удаляет их оттуда одним запросом к базе.
+        """
+        serializer = BatchIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        user = request.user
+        found = set(
+            Recipe.objects.filter(pk__in=ids).values_list('pk', flat=True)
+        )
+        relations = model.objects.filter(user=user, recipe_id__in=found)
+        with transaction.atomic():
+            lock_user(user)
+            current = set(relations.values_list('recipe_id', flat=True))
+            if request.method == 'POST':
+                changed = [pk for pk in ids if pk in found - current]
+                model.objects.bulk_create(
+                    [model(user=user, recipe_id=pk) for pk in changed],
+                    ignore_conflicts=True
+                )
+                delta, done, skipped = 1, 'created', 'exists'
+            else:
+                changed = [pk for pk in ids if pk in current]
+                # Без обработчиков сигналов: производные данные
+                # обновляются ниже одним вызовом на всю пачку.
+                with muted_signals(model):
+                    relations.filter(recipe_id__in=changed).delete()
+                delta, done, skipped = -1, 'deleted', 'absent'
+            if changed:
+                user_recipes_changed(model, user.pk, changed, delta)
+                bump_user_version_on_commit(user)
+        return Response(
+            batch_results(ids, found, set(changed), done, skipped)
+        )
+
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        permission_classes=[IsAuthenticated],
+        url_path='favorite/batch'
+    )
+    def favorite_batch(self, request):
+        """Пакетно добавить или удалить рецепты из избранного."""
+        return self._batch_user_recipes(Favorite, request)
+
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        permission_classes=[IsAuthenticated],
+        url_path='shopping_cart/batch'
+    )
+    def shopping_cart_batch(self, request):
+        """Пакетно добавить или удалить рецепты из корзины."""
+        return self._batch_user_recipes(ShoppingCart, request)
+
     @action(
         detail=True,
         methods=['post', 'delete'],
@@ -320,29 +574,93 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
-        detail=False, methods=['get'], permission_classes=[IsAuthenticated]
+        detail=False,
+        methods=['get'],
+        permission_classes=[IsAuthenticated],
+        pagination_class=CursorPaginator
     )
-    def download_shopping_cart(self, request):
-        """Скачать список покупок."""
-        ingredients = IngredientInRecipe.objects.filter(
-            recipe__shoppingcart_related__user=request.user
-        ).values(
-            name=F('ingredient__name'),
-            measurement_unit=F('ingredient__measurement_unit')
-        ).annotate(amount=Sum('amount'))
-
-        shopping_list = "Список покупок:\n\n"
-        for item in ingredients:
-            shopping_list += (
-                f"{item['name']} ({item['measurement_unit']}) "
-                f"— {item['amount']}\n"
-            )
+    def feed(self, request):
+        """
+        Лента рецептов авторов, на которых подписан пользователь,
+        от новых к старым с курсорной пагинацией.
+        """
+        queryset = self.filter_queryset(
+            feed_queryset(request.user, self.get_queryset())
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
-        response = HttpResponse(shopping_list, content_type='text/plain')
-        response['Content-Disposition'] = (
-            'attachment; filename="shopping_cart.txt"'
+    @action(detail=False, methods=['get'], pagination_class=PagePaginator)
+    def pantry(self, request):
+        """
+        Рецепты из имеющихся ингредиентов (?ingredients=1&ingredients=2),
+        от большей доли имеющихся ингредиентов к меньшей. Подбор идёт
+        по индексу в памяти, из базы читается только страница.
+        """
+        params = request.query_params
+        query = PantryQuerySerializer(data={
+            **params.dict(),
+            'ingredients': params.getlist('ingredients'),
+            'tags': params.getlist('tags'),
+        })
+        query.is_valid(raise_exception=True)
+        page = self.paginate_queryset(
+            pantry_index.get_snapshot().search(**query.validated_data)
+        )
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for recipe_id, _, _ in page]
+        )
+        data = []
+        for recipe_id, coverage, missing in page:
+            if recipe_id not in recipes:
+                continue
+            item = self.get_serializer(recipes[recipe_id]).data
+            item['coverage'] = round(coverage, 4)
+            item['missing_ingredients'] = missing
+            data.append(item)
+        return self.get_paginated_response(data)
+
+    @action(detail=True, methods=['get'], pagination_class=None)
+    def similar(self, request, pk=None):
+        """
+        Похожие рецепты по общим ингредиентам и тегам, от самых
+        похожих. Соседи посчитаны заранее (recipes.similarity),
+        поэтому это один запрос по индексу.
+        """
+        recipes = [
+            row.similar for row in SimilarRecipe.objects.filter(
+                recipe_id=pk
+            ).select_related('similar').order_by('-score', 'similar_id')
+        ]
+        if not recipes:
+            get_object_or_404(Recipe, pk=pk)
+        serializer = RecipeShortSerializer(
+            recipes, many=True, context={'request': request}
+        )
+        return Response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=[IsAuthenticated],
+        renderer_classes=[
+            TextExportRenderer,
+            CSVExportRenderer,
+            XLSXExportRenderer,
+            JSONRenderer,
+        ],
+    )
+    def download_shopping_cart(self, request):
+        """
+        Скачать список покупок: ?format=txt (по умолчанию), csv, xlsx
+        или json. Итоги берутся из ShoppingListItem, строки читаются
+        из базы курсором и отдаются потоком.
+        """
+        return shopping_list_response(
+            shopping_list_rows(request.user).iterator(),
+            request.accepted_renderer.format
         )
-        return response
 
     @action(
         detail=True,
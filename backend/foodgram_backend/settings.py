@@ -32,6 +32,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.RequestMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -79,6 +80,33 @@ DATABASES = {
     }
 }
 
+# Счётчики поколений (api.cache), от которых зависят кеш ответов,
+# ETag и индексы в памяти, должны быть общими для воркеров gunicorn
+# и management-команд. По умолчанию кеш хранится в таблице базы,
+# её создаёт команда createcachetable.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'foodgram_cache'),
+    }
+}
+
+RESPONSE_CACHE_ENABLED = (
+    os.getenv('RESPONSE_CACHE_ENABLED', 'True').lower() == 'true'
+)
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 60 * 60))
+# max-age для предрассчитанных ответов (теги, каталог ингредиентов).
+PRECOMPUTED_RESPONSE_MAX_AGE = int(
+    os.getenv('PRECOMPUTED_RESPONSE_MAX_AGE', 60 * 60 * 24)
+)
+# Индекс подбора по ингредиентам (api.pantry) после записи рецептов
+# перестраивается не чаще раза в столько секунд.
+PANTRY_INDEX_MAX_STALENESS = int(
+    os.getenv('PANTRY_INDEX_MAX_STALENESS', 60)
+)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -122,6 +150,48 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Доля запросов, для которых собираются метрики SQL и времени ответа.
+REQUEST_METRICS_SAMPLE_RATE = float(
+    os.getenv('REQUEST_METRICS_SAMPLE_RATE', 0.01)
+)
+# Отдавать ли метрики клиенту в заголовке Server-Timing
+# (по умолчанию только при DEBUG); в лог они пишутся всегда.
+REQUEST_METRICS_SERVER_TIMING = os.getenv(
+    'REQUEST_METRICS_SERVER_TIMING', str(DEBUG)
+).lower() == 'true'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api.middleware': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+# Варианты изображений (уменьшенное, миниатюра, WebP) строятся
+# в фоновом пуле из IMAGE_WORKERS процессов.
+IMAGE_VARIANTS_ENABLED = (
+    os.getenv('IMAGE_VARIANTS_ENABLED', 'True').lower() == 'true'
+)
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+
+# Способ чтения рецептов: 'serializer' (RecipeReadSerializer)
+# или 'values' (api.fast_serializers.RecipeValuesSerializer).
+RECIPE_READ_PIPELINE = os.getenv('RECIPE_READ_PIPELINE', 'serializer')
+
+# Бэкенд поиска рецептов (?search=): путь к классу из recipes.search.
+# По умолчанию PostgresSearchBackend для PostgreSQL
+# и InMemorySearchBackend для остальных баз.
+RECIPE_SEARCH_BACKEND = os.getenv('RECIPE_SEARCH_BACKEND')
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'HIDE_USERS': False,
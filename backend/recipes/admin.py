@@ -35,11 +35,7 @@ class RecipeAdmin(admin.ModelAdmin):
     search_fields = ('name', 'author__username', 'author__email')
     list_filter = ('tags', 'author')
     filter_horizontal = ('tags',)
-    readonly_fields = ('favorites_count',)
-
-    @admin.display(description='В избранном')
-    def favorites_count(self, obj):
-        return obj.recipe_favorites.count()
+    readonly_fields = ('favorites_count', 'shopping_cart_count')
 
 
 @admin.register(IngredientInRecipe)
@@ -1,3 +1,20 @@
 TAG_NAME_MAX_LENGTH = 200
 INGREDIENT_NAME_MAX_LENGTH = 200
 MEASUREMENT_UNIT_MAX_LENGTH = 200
+# Лента подписок: авторы с большим числом подписчиков не раскладываются
+# по лентам при публикации, их рецепты подмешиваются при чтении.
+FEED_FANOUT_MAX_FOLLOWERS = 1000
+FEED_MAX_ENTRIES = 500
+FEED_BACKFILL_RECIPES = 20
+# Похожие рецепты: сколько соседей хранить и ингредиенты,
+# встречающиеся чаще, не порождают кандидатов (соль, вода).
+SIMILAR_RECIPES_LIMIT = 10
+SIMILAR_MAX_POSTINGS = 5000
+# Рейтинги рецептов: вклад добавления в избранное и в список покупок
+# затухает вдвое за период полураспада. Для trending учитываются
+# только события последних TRENDING_WINDOW_DAYS дней.
+FAVORITE_WEIGHT = 1.0
+SHOPPING_CART_WEIGHT = 0.5
+POPULARITY_HALF_LIFE_DAYS = 30
+TRENDING_HALF_LIFE_DAYS = 2
+TRENDING_WINDOW_DAYS = 14
@@ -0,0 +1,246 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from io import StringIO
+from itertools import islice
+from math import gcd
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db import reset_queries, transaction
+from django.utils import timezone
+
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    IngredientInRecipe,
+    Recipe,
+    ShoppingCart,
+    Tag,
+)
+from users.models import Subscription
+
+User = get_user_model()
+
+DATASETS = {
+    'small': {'users': 20, 'recipes': 100},
+    'medium': {'users': 200, 'recipes': 2000},
+    'large': {'users': 1000, 'recipes': 20000},
+    'production': {'users': 100_000, 'recipes': 1_000_000},
+}
+DEFAULT_RATES = {
+    'ingredients_per_recipe': 8,
+    'favorites_per_user': 20,
+    'carts_per_user': 5,
+    'subscriptions_per_user': 10,
+}
+PUB_DATE_SPREAD = timedelta(days=365 * 3)
+
+
+class ZipfSampler:
+    """
+    Выбор id из непрерывного диапазона [first_id, first_id + size)
+    по закону Ципфа без хранения диапазона в памяти.
+    Ранги перемешиваются фиксированной перестановкой, чтобы популярные
+    объекты не совпадали с первыми id.
+    """
+
+    def __init__(self, rng, first_id, size, exponent=1.1):
+        self.rng = rng
+        self.first_id = first_id
+        self.size = size
+        self.power = 1 - exponent
+        self.step = rng.randrange(1, size + 1)
+        while gcd(self.step, size) != 1:
+            self.step += 1
+
+    def sample(self):
+        u = self.rng.random()
+        rank = ((self.size ** self.power - 1) * u + 1) ** (1 / self.power)
+        rank = min(int(rank), self.size) - 1
+        return self.first_id + (rank * self.step) % self.size
+
+    def sample_unique(self, count, exclude=None):
+        """До count различных id (повторы при выборке отбрасываются)."""
+        count = min(count, self.size)
+        result = set()
+        for _ in range(count * 3):
+            if len(result) >= count:
+                break
+            value = self.sample()
+            if value != exclude:
+                result.add(value)
+        return result
+
+
+@contextmanager
+def explicit_pub_date():
+    """Позволяет задавать Recipe.pub_date при bulk_create."""
+    field = Recipe._meta.get_field('pub_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def bulk_insert(model, objects, chunk_size):
+    """
+    Вставляет объекты из итератора пачками по chunk_size.
+    В памяти одновременно находится не больше одной пачки
+    (журнал запросов при DEBUG тоже очищается).
+    """
+    objects = iter(objects)
+    total = 0
+    while True:
+        chunk = list(islice(objects, chunk_size))
+        if not chunk:
+            return total
+        with transaction.atomic():
+            model.objects.bulk_create(chunk, ignore_conflicts=True)
+        reset_queries()
+        total += len(chunk)
+
+
+def next_id(model):
+    last = model.objects.order_by('-pk').values_list('pk', flat=True).first()
+    return (last or 0) + 1
+
+
+def inserted_range(model, first_id, count):
+    """
+    Проверяет, что вставленные строки заняли непрерывный диапазон id,
+    и возвращает его.
+    """
+    ids = model.objects.filter(pk__gte=first_id)
+    start = ids.order_by('pk').values_list('pk', flat=True).first()
+    if start is None or ids.filter(pk__lt=start + count).count() != count:
+        raise RuntimeError(
+            f'{model.__name__}: id вставленных строк не непрерывны, '
+            'генерация возможна только без параллельной записи в базу.'
+        )
+    return range(start, start + count)
+
+
+def generate_dataset(
+    users,
+    recipes,
+    seed=0,
+    chunk_size=5000,
+    zipf_exponent=1.1,
+    log=None,
+    **rates
+):
+    """
+    Заполняет базу детерминированным набором пользователей, рецептов,
+    ингредиентов в рецептах, избранного, списков покупок и подписок.
+    Популярность авторов, рецептов и ингредиентов распределена
+    по закону Ципфа. Потребление памяти ограничено размером пачки.
+    Ингредиенты и теги должны быть загружены заранее (команда load).
+    Похожие рецепты не считаются: полный пересчёт держит в памяти
+    всю матрицу, его запускают отдельно командой rebuild_similar.
+    Возвращает диапазон id созданных пользователей.
+    """
+    rates = {**DEFAULT_RATES, **rates}
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    tag_ids = list(Tag.objects.order_by('id').values_list('id', flat=True))
+    ingredient_ids = list(
+        Ingredient.objects.order_by('id').values_list('id', flat=True)
+    )
+    if not tag_ids or not ingredient_ids:
+        raise RuntimeError('Сначала загрузите ингредиенты и теги: load')
+
+    def insert(name, model, objects):
+        start = time.perf_counter()
+        total = bulk_insert(model, objects, chunk_size)
+        log(f'{name}: {total} строк за {time.perf_counter() - start:.1f} с')
+
+    password = make_password('password')
+    first_id = next_id(User)
+    prefix = f'seed{seed}_{first_id}_'
+    insert('Пользователи', User, (
+        User(
+            email=f'{prefix}{i}@example.com',
+            username=f'{prefix}{i}',
+            first_name='Имя',
+            last_name='Фамилия',
+            password=password,
+        )
+        for i in range(users)
+    ))
+    user_ids = inserted_range(User, first_id, users)
+    authors = ZipfSampler(rng, user_ids.start, users, zipf_exponent)
+
+    now = timezone.now()
+    first_id = next_id(Recipe)
+    with explicit_pub_date():
+        insert('Рецепты', Recipe, (
+            Recipe(
+                author_id=authors.sample(),
+                name=f'Рецепт {i}',
+                text='Описание рецепта. ' * rng.randint(1, 20),
+                cooking_time=rng.randint(1, 180),
+                pub_date=now - PUB_DATE_SPREAD * (1 - i / recipes),
+            )
+            for i in range(recipes)
+        ))
+    recipe_ids = inserted_range(Recipe, first_id, recipes)
+    popular_recipes = ZipfSampler(
+        rng, recipe_ids.start, recipes, zipf_exponent
+    )
+    popular_ingredients = ZipfSampler(
+        rng, 0, len(ingredient_ids), zipf_exponent
+    )
+
+    insert('Теги рецептов', Recipe.tags.through, (
+        Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+        for recipe_id in recipe_ids
+        for tag_id in rng.sample(tag_ids, rng.randint(1, len(tag_ids)))
+    ))
+    insert('Ингредиенты в рецептах', IngredientInRecipe, (
+        IngredientInRecipe(
+            recipe_id=recipe_id,
+            ingredient_id=ingredient_ids[index],
+            amount=rng.randint(1, 500),
+        )
+        for recipe_id in recipe_ids
+        for index in popular_ingredients.sample_unique(
+            rng.randint(1, rates['ingredients_per_recipe'] * 2 - 1)
+        )
+    ))
+    for name, model, rate in (
+        ('Избранное', Favorite, 'favorites_per_user'),
+        ('Списки покупок', ShoppingCart, 'carts_per_user'),
+    ):
+        insert(name, model, (
+            model(user_id=user_id, recipe_id=recipe_id)
+            for user_id in user_ids
+            for recipe_id in popular_recipes.sample_unique(
+                rng.randint(0, rates[rate] * 2)
+            )
+        ))
+    insert('Подписки', Subscription, (
+        Subscription(user_id=user_id, author_id=author_id)
+        for user_id in user_ids
+        for author_id in authors.sample_unique(
+            rng.randint(0, rates['subscriptions_per_user'] * 2),
+            exclude=user_id
+        )
+    ))
+
+    start = time.perf_counter()
+    call_command('rebuild_counters', stdout=StringIO())
+    log(f'Счётчики пересчитаны за {time.perf_counter() - start:.1f} с')
+    start = time.perf_counter()
+    call_command('rebuild_shopping_lists', stdout=StringIO())
+    log(f'Списки покупок пересчитаны за {time.perf_counter() - start:.1f} с')
+    start = time.perf_counter()
+    call_command('rebuild_feeds', stdout=StringIO())
+    log(f'Ленты подписок построены за {time.perf_counter() - start:.1f} с')
+    start = time.perf_counter()
+    call_command('rollup_popularity', stdout=StringIO())
+    log(f'Рейтинги пересчитаны за {time.perf_counter() - start:.1f} с')
+    return user_ids
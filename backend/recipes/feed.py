@@ -0,0 +1,166 @@
+from django.db import connection
+from django.db.models import (
+    Exists,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    Value,
+    Window,
+)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
+
+from recipes.constants import (
+    FEED_BACKFILL_RECIPES,
+    FEED_FANOUT_MAX_FOLLOWERS,
+    FEED_MAX_ENTRIES,
+)
+from recipes.models import FeedEntry, Recipe
+from users.models import Subscription
+
+FEED_COLUMNS = ('user_id', 'recipe_id', 'author_id', 'pub_date')
+FEED_VALUES = ('feed_user', 'feed_recipe', 'feed_author', 'feed_pub_date')
+
+
+def _ranked_sql(queryset, partition_by, order_by, *fields):
+    """SQL запроса с номером строки (row_number) внутри partition_by."""
+    return queryset.annotate(
+        row_number=Window(
+            expression=RowNumber(),
+            partition_by=[F(partition_by)],
+            order_by=order_by,
+        )
+    ).order_by().values(*fields, 'row_number').query.sql_with_params()
+
+
+def _insert_top(queryset, partition_by, order_by, limit):
+    """
+    Вставляет в ленту первые limit строк queryset (с колонками
+    FEED_VALUES) в каждой группе partition_by одним INSERT ... SELECT,
+    не загружая строки в память.
+    """
+    sql, params = _ranked_sql(queryset, partition_by, order_by, *FEED_VALUES)
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(FeedEntry._meta.db_table)} '
+            f'({", ".join(map(quote, FEED_COLUMNS))}) '
+            f'SELECT {", ".join(FEED_VALUES)} FROM ({sql}) ranked '
+            'WHERE ranked.row_number <= %s',
+            (*params, limit)
+        )
+
+
+def _subscription_rows(subscriptions):
+    """Строки ленты из подписок: подписчик и рецепты автора."""
+    return subscriptions.annotate(
+        feed_user=F('user_id'),
+        feed_recipe=F('author__recipes__id'),
+        feed_author=F('author_id'),
+        feed_pub_date=F('author__recipes__pub_date'),
+    )
+
+
+def trim_feeds(user_ids):
+    """
+    Оставляет в лентах пользователей FEED_MAX_ENTRIES последних записей.
+    user_ids может быть подзапросом.
+    """
+    sql, params = _ranked_sql(
+        FeedEntry.objects.filter(user_id__in=user_ids),
+        'user_id',
+        [F('pub_date').desc(), F('recipe_id').desc()],
+        'id'
+    )
+    FeedEntry.objects.filter(pk__in=RawSQL(
+        f'SELECT ranked.id FROM ({sql}) ranked '
+        'WHERE ranked.row_number > %s',
+        (*params, FEED_MAX_ENTRIES)
+    )).delete()
+
+
+def fan_out(recipe):
+    """
+    Раскладывает новый рецепт по лентам подписчиков автора
+    одним INSERT ... SELECT из подписок и обрезает их ленты.
+    Рецепты популярных авторов не раскладываются:
+    feed_queryset подмешивает их при чтении.
+    """
+    followers = Subscription.objects.filter(
+        author_id=recipe.author_id,
+        author__followers_count__lte=FEED_FANOUT_MAX_FOLLOWERS,
+    )
+    _insert_top(
+        _subscription_rows(followers.filter(author__recipes=recipe.pk)),
+        'user_id', [F('user_id')], 1
+    )
+    trim_feeds(followers.values('user_id'))
+
+
+def backfill(user_id, author_ids):
+    """
+    Добавляет в ленту пользователя последние FEED_BACKFILL_RECIPES
+    рецептов каждого из авторов, на которых он подписался.
+    """
+    _insert_top(
+        Recipe.objects.filter(
+            author_id__in=author_ids,
+            author__followers_count__lte=FEED_FANOUT_MAX_FOLLOWERS,
+        ).exclude(
+            Exists(FeedEntry.objects.filter(
+                user_id=user_id, recipe_id=OuterRef('pk')
+            ))
+        ).annotate(
+            feed_user=Value(user_id, output_field=IntegerField()),
+            feed_recipe=F('id'),
+            feed_author=F('author_id'),
+            feed_pub_date=F('pub_date'),
+        ),
+        'author_id',
+        [F('pub_date').desc(), F('id').desc()],
+        FEED_BACKFILL_RECIPES
+    )
+    trim_feeds([user_id])
+
+
+def remove_authors(user_id, author_ids):
+    """Убирает из ленты пользователя рецепты авторов после отписки."""
+    FeedEntry.objects.filter(
+        user_id=user_id, author_id__in=author_ids
+    ).delete()
+
+
+def rebuild_feeds(user_ids):
+    """
+    Заново строит ленты пользователей по их подпискам:
+    FEED_MAX_ENTRIES последних рецептов непопулярных авторов.
+    """
+    FeedEntry.objects.filter(user_id__in=user_ids).delete()
+    _insert_top(
+        _subscription_rows(Subscription.objects.filter(
+            user_id__in=user_ids,
+            author__followers_count__lte=FEED_FANOUT_MAX_FOLLOWERS,
+            author__recipes__isnull=False,
+        )),
+        'user_id',
+        [F('author__recipes__pub_date').desc(),
+         F('author__recipes__id').desc()],
+        FEED_MAX_ENTRIES
+    )
+
+
+def feed_queryset(user, queryset=None):
+    """
+    Рецепты ленты пользователя: записи FeedEntry (fan-out при записи)
+    и рецепты популярных авторов из подписок (чтение при запросе).
+    """
+    if queryset is None:
+        queryset = Recipe.objects.all()
+    return queryset.filter(
+        Q(pk__in=FeedEntry.objects.filter(user=user).values('recipe_id'))
+        | Q(author__in=Subscription.objects.filter(
+            user=user,
+            author__followers_count__gt=FEED_FANOUT_MAX_FOLLOWERS,
+        ).values('author_id'))
+    )
@@ -1,19 +1,133 @@
 import csv
+import hashlib
+import json
 import os
+import re
+import time
+from itertools import islice
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import transaction
 
-from recipes.models import Ingredient, Tag
+from api.cache import (
+    CATALOG_VERSION,
+    INGREDIENTS_VERSION,
+    TAGS_VERSION,
+    bump_version,
+)
+from recipes.models import DataImport, Ingredient, Tag
+
+TAGS_DATA = [
+    {"name": "Завтрак", "slug": "breakfast"},
+    {"name": "Обед", "slug": "lunch"},
+    {"name": "Ужин", "slug": "dinner"},
+]
+HASH_BLOCK_SIZE = 64 * 1024
+JSON_READ_SIZE = 64 * 1024
+WHITESPACE_RE = re.compile(r'\s*')
+
+
+def file_hash(path):
+    """SHA-256 содержимого файла, читаемого блоками."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_json_array(file, read_size=JSON_READ_SIZE):
+    """
+    Элементы JSON-массива верхнего уровня по одному. Файл читается
+    блоками по read_size, в памяти держится только неразобранный
+    остаток блока, а не весь документ.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = '', 0, False
+    expected = '['
+
+    def read_more():
+        nonlocal buffer, pos, eof
+        chunk = file.read(read_size)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+    while True:
+        pos = WHITESPACE_RE.match(buffer, pos).end()
+        if pos == len(buffer):
+            if eof:
+                raise ValueError('Неожиданный конец JSON-файла')
+            read_more()
+            continue
+        char = buffer[pos]
+        if expected == '[':
+            if char != '[':
+                raise ValueError('Ожидается JSON-массив')
+            pos, expected = pos + 1, 'first'
+        elif char == ']' and expected in ('first', 'separator'):
+            return
+        elif expected == 'separator':
+            if char != ',':
+                raise ValueError(f'Ожидается запятая, а не {char!r}')
+            pos, expected = pos + 1, 'value'
+        else:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                read_more()
+                continue
+            # Число в конце блока могло оборваться на середине.
+            if end == len(buffer) and not eof:
+                read_more()
+                continue
+            yield item
+            pos, expected = end, 'separator'
+
+
+def elapsed_ms(start):
+    return round((time.perf_counter() - start) * 1000, 1)
 
 
 class Command(BaseCommand):
-    """Команда для загрузки ингредиентов и тегов из CSV файла."""
+    """
+    Команда для загрузки ингредиентов (CSV, JSON или JSON Lines)
+    и тегов. Строки читаются потоком и вставляются пачками bulk_create
+    с ignore_conflicts. Если хеш данных совпадает с сохранённым
+    в DataImport, загрузка пропускается.
+    """
 
-    help = "Загрузка данных в БД из CSV файла"
+    help = (
+        "Загрузка ингредиентов и тегов в БД из CSV, JSON или JSON Lines "
+        "файла; все форматы читаются потоком"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            help='Файл ингредиентов .csv, .json (массив объектов) или '
+                 '.jsonl (по объекту в строке), по умолчанию '
+                 'data/ingredients.csv'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Размер пачки bulk_create'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Загрузить, даже если данные не менялись'
+        )
 
     def handle(self, *args, **options):
-        file_path = os.path.join(settings.BASE_DIR, 'data', 'ingredients.csv')
+        start = time.perf_counter()
+        file_path = options['path'] or os.path.join(
+            settings.BASE_DIR, 'data', 'ingredients.csv'
+        )
 
         if not os.path.exists(file_path):
             self.stdout.write(
@@ -21,65 +135,108 @@ class Command(BaseCommand):
             )
             return
 
-        # Загрузка ингредиентов
+        created_ingredients = self.load_dataset(
+            'ingredients',
+            'ингредиентов',
+            file_hash(file_path),
+            Ingredient,
+            self.read_ingredients(file_path),
+            options,
+        )
+        created_tags = self.load_dataset(
+            'tags',
+            'тегов',
+            hashlib.sha256(
+                json.dumps(TAGS_DATA, sort_keys=True).encode()
+            ).hexdigest(),
+            Tag,
+            (Tag(**tag_data) for tag_data in TAGS_DATA),
+            options,
+        )
+
+        # bulk_create не отправляет сигналы, поэтому кеши
+        # сбрасываются здесь.
+        versions = []
+        if created_ingredients:
+            versions.append(INGREDIENTS_VERSION)
+        if created_tags:
+            versions.append(TAGS_VERSION)
+        if versions:
+            bump_version(CATALOG_VERSION, *versions)
+
+        self.stdout.write(f'⏱ Загрузка заняла {elapsed_ms(start)} мс')
+
+    def read_rows(self, file_path):
+        """Строки файла ингредиентов с номерами: CSV, JSON или JSON Lines."""
         with open(file_path, encoding='utf-8') as f:
-            reader = csv.reader(f)
-            ingredients_to_create = []
-            for row_num, row in enumerate(reader, start=1):
-                if len(row) != 2:
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f'Строка {row_num}: некорректное количество полей '
-                            f'— {row}'
-                        )
-                    )
-                    continue
-                name, measurement_unit = [field.strip() for field in row]
-                if not name or not measurement_unit:
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f'Строка {row_num}: пустые поля — {row}'
-                        )
+            if file_path.endswith('.jsonl'):
+                items = (json.loads(line) for line in f if line.strip())
+            elif file_path.endswith('.json'):
+                items = iter_json_array(f)
+            else:
+                yield from enumerate(csv.reader(f), start=1)
+                return
+            for row_num, item in enumerate(items, start=1):
+                yield row_num, [
+                    item.get('name', ''),
+                    item.get('measurement_unit', ''),
+                ]
+
+    def read_ingredients(self, file_path):
+        """Ингредиенты из файла, некорректные строки пропускаются."""
+        for row_num, row in self.read_rows(file_path):
+            if len(row) != 2:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f'Строка {row_num}: некорректное количество полей '
+                        f'— {row}'
                     )
-                    continue
-                ingredients_to_create.append(
-                    Ingredient(name=name, measurement_unit=measurement_unit)
                 )
-
-            # Массовое создание без дубликатов
-            created_count = 0
-            for ingredient in ingredients_to_create:
-                obj, created = Ingredient.objects.get_or_create(
-                    name=ingredient.name,
-                    measurement_unit=ingredient.measurement_unit
+                continue
+            name, measurement_unit = [field.strip() for field in row]
+            if not name or not measurement_unit:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f'Строка {row_num}: пустые поля — {row}'
+                    )
                 )
-                if created:
-                    created_count += 1
+                continue
+            yield Ingredient(name=name, measurement_unit=measurement_unit)
 
+    def load_dataset(self, name, label, content_hash, model, objects,
+                     options):
+        """
+        Загружает объекты пачками, если хеш набора данных изменился.
+        Возвращает число созданных объектов.
+        """
+        start = time.perf_counter()
+        if not options['force'] and DataImport.objects.filter(
+            name=name, content_hash=content_hash
+        ).exists():
             self.stdout.write(
-                self.style.SUCCESS(
-                    f'✅ Успешно загружено ингредиентов: {created_count}'
-                )
+                f'⏭ Данные {label} не изменились ({elapsed_ms(start)} мс)'
             )
+            return 0
 
-        # Создание тегов
-        tags_data = [
-            {"name": "Завтрак", "slug": "breakfast"},
-            {"name": "Обед", "slug": "lunch"},
-            {"name": "Ужин", "slug": "dinner"},
-        ]
-
-        created_tags = 0
-        for tag_data in tags_data:
-            obj, created = Tag.objects.get_or_create(
-                slug=tag_data['slug'],
-                defaults=tag_data
+        rows = 0
+        with transaction.atomic():
+            count_before = model.objects.count()
+            while True:
+                chunk = list(islice(objects, options['chunk_size']))
+                if not chunk:
+                    break
+                model.objects.bulk_create(chunk, ignore_conflicts=True)
+                rows += len(chunk)
+            created_count = model.objects.count() - count_before
+            DataImport.objects.update_or_create(
+                name=name,
+                defaults={'content_hash': content_hash, 'rows': rows}
             )
-            if created:
-                created_tags += 1
 
         self.stdout.write(
             self.style.SUCCESS(
-                f'✅ Успешно создано тегов: {created_tags}'
+                f'✅ Успешно загружено {label}: {created_count} '
+                f'из {rows} строк ({elapsed_ms(start)} мс)'
             )
         )
+        return created_count
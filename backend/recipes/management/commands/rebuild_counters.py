@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription
+
+User = get_user_model()
+
+
+def count_subquery(model, field):
+    """Подзапрос с количеством строк model, ссылающихся на OuterRef('pk')."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+COUNTERS = {
+    Recipe: {
+        'favorites_count': (Favorite, 'recipe'),
+        'shopping_cart_count': (ShoppingCart, 'recipe'),
+    },
+    User: {
+        'recipes_count': (Recipe, 'author'),
+        'followers_count': (Subscription, 'author'),
+        'following_count': (Subscription, 'user'),
+    },
+}
+
+
+class Command(BaseCommand):
+    """Команда для пересчёта денормализованных счётчиков."""
+
+    help = "Пересчёт счётчиков избранного, покупок, рецептов и подписок"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить счётчики, не исправляя их'
+        )
+
+    def handle(self, *args, **options):
+        mismatched = 0
+        with transaction.atomic():
+            for model, counters in COUNTERS.items():
+                expected = {
+                    field: count_subquery(*source)
+                    for field, source in counters.items()
+                }
+                stale = Q()
+                for field in counters:
+                    stale |= ~Q(**{field: F(f'expected_{field}')})
+                count = model.objects.annotate(**{
+                    f'expected_{field}': value
+                    for field, value in expected.items()
+                }).filter(stale).count()
+                mismatched += count
+                self.stdout.write(
+                    f'{model._meta.verbose_name_plural}: '
+                    f'расхождений — {count}'
+                )
+                if count and not options['check']:
+                    model.objects.update(**expected)
+
+        if options['check'] and mismatched:
+            raise CommandError(f'Найдено расхождений: {mismatched}')
+        if options['check']:
+            self.stdout.write(self.style.SUCCESS('✅ Счётчики актуальны'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Счётчики пересчитаны'))
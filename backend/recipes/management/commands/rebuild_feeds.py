@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.feed import rebuild_feeds
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Команда для перестроения лент подписок (FeedEntry)."""
+
+    help = "Перестроение лент подписок пользователей"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Сколько пользователей перестраивать за раз'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+        chunk_size = options['chunk_size']
+        total = 0
+        last_id = 0
+        while True:
+            chunk = list(user_ids.filter(pk__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            with transaction.atomic():
+                rebuild_feeds(chunk)
+            total += len(chunk)
+            last_id = chunk[-1]
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Ленты перестроены: {total} пользователей'
+        ))
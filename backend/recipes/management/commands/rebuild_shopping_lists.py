@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.shopping_list import sync_shopping_list
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Команда для пересчёта итогов списков покупок (ShoppingListItem)."""
+
+    help = "Пересчёт итогов списков покупок по корзинам пользователей"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить итоги, не исправляя их'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Сколько пользователей пересчитывать за раз'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+        chunk_size = options['chunk_size']
+        mismatched = 0
+        last_id = 0
+        while True:
+            chunk = list(user_ids.filter(pk__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            mismatched += sync_shopping_list(chunk, dry_run=options['check'])
+            last_id = chunk[-1]
+
+        self.stdout.write(f'Расхождений в списках покупок — {mismatched}')
+        if options['check'] and mismatched:
+            raise CommandError(f'Найдено расхождений: {mismatched}')
+        if options['check']:
+            self.stdout.write(self.style.SUCCESS('✅ Итоги актуальны'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Итоги пересчитаны'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from recipes.similarity import rebuild_similar
+
+
+class Command(BaseCommand):
+    """Команда для пересчёта похожих рецептов (SimilarRecipe)."""
+
+    help = "Пересчёт похожих рецептов по ингредиентам и тегам"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Для скольких рецептов записывать соседей за раз'
+        )
+
+    def handle(self, *args, **options):
+        total = rebuild_similar(options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Похожие рецепты посчитаны: {total} рецептов'
+        ))
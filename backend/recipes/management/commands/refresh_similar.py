@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from recipes.similarity import process_similar_queue
+
+
+class Command(BaseCommand):
+    """
+    Команда для пересчёта похожих рецептов из очереди
+    (SimilarRecipeRefresh). Запускается периодически.
+    """
+
+    help = "Пересчёт похожих рецептов, у которых изменился состав или теги"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=100,
+            help='Сколько рецептов из очереди пересчитывать за раз'
+        )
+
+    def handle(self, *args, **options):
+        total = process_similar_queue(options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Похожие рецепты обновлены: {total} рецептов'
+        ))
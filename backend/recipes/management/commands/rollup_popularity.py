@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import RECIPES_VERSION, bump_version
+from recipes.popularity import rollup_popularity
+
+
+class Command(BaseCommand):
+    """
+    Команда для пересчёта рейтингов рецептов (popularity, trending).
+    Запускается периодически, например из cron раз в час.
+    """
+
+    help = "Пересчёт рейтингов популярности рецептов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Сколько рецептов обновлять одним запросом'
+        )
+
+    def handle(self, *args, **options):
+        total = rollup_popularity(chunk_size=options['chunk_size'])
+        bump_version(RECIPES_VERSION)
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Рейтинги пересчитаны: {total} рецептов'
+        ))
@@ -0,0 +1,57 @@
+# Generated by Django 3.2.3 on 2026-10-17 04:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def count_subquery(model, field):
+    return models.functions.Coalesce(
+        models.Subquery(
+            model.objects.filter(**{field: models.OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=models.Count('pk'))
+            .values('total'),
+            output_field=models.IntegerField()
+        ),
+        0
+    )
+
+
+def fill_counters(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Favorite = apps.get_model('recipes', 'Favorite')
+    ShoppingCart = apps.get_model('recipes', 'ShoppingCart')
+    Subscription = apps.get_model('users', 'Subscription')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Recipe.objects.update(
+        favorites_count=count_subquery(Favorite, 'recipe'),
+        shopping_cart_count=count_subquery(ShoppingCart, 'recipe'),
+    )
+    User.objects.update(
+        recipes_count=count_subquery(Recipe, 'author'),
+        followers_count=count_subquery(Subscription, 'author'),
+        following_count=count_subquery(Subscription, 'user'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_recipe_pub_date_id_idx'),
+        ('users', '0005_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='shopping_cart_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='В списках покупок'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.3 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_author_pub_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_variants_source',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Изображение с готовыми вариантами'),
+        ),
+    ]
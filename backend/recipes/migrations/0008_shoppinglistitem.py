@@ -0,0 +1,57 @@
+# Generated by Django 3.2.3 on 2026-10-17 13:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+CHUNK_SIZE = 5000
+
+
+def fill_shopping_lists(apps, schema_editor):
+    ShoppingCart = apps.get_model('recipes', 'ShoppingCart')
+    ShoppingListItem = apps.get_model('recipes', 'ShoppingListItem')
+    rows = ShoppingCart.objects.filter(
+        recipe__ingredientinrecipe__isnull=False
+    ).values_list(
+        'user_id', 'recipe__ingredientinrecipe__ingredient_id'
+    ).annotate(
+        total=models.Sum('recipe__ingredientinrecipe__amount')
+    ).order_by()
+    chunk = []
+    for user_id, ingredient_id, total in rows.iterator():
+        chunk.append(ShoppingListItem(
+            user_id=user_id, ingredient_id=ingredient_id, total_amount=total
+        ))
+        if len(chunk) >= CHUNK_SIZE:
+            ShoppingListItem.objects.bulk_create(chunk)
+            chunk = []
+    ShoppingListItem.objects.bulk_create(chunk)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0007_recipe_image_variants_source'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingListItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_amount', models.PositiveIntegerField(verbose_name='Количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recipes.ingredient')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list_items', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Позиция списка покупок',
+                'verbose_name_plural': 'Позиции списков покупок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shoppinglistitem',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_shopping_list_item'),
+        ),
+        migrations.RunPython(fill_shopping_lists, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 3.2.3 on 2026-10-17 14:00
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+import django.db.models.deletion
+
+# Значения FEED_MAX_ENTRIES и FEED_FANOUT_MAX_FOLLOWERS
+# на момент миграции.
+FEED_MAX_ENTRIES = 500
+FEED_FANOUT_MAX_FOLLOWERS = 1000
+BATCH_SIZE = 1000
+
+
+def backfill_feeds(apps, schema_editor):
+    """
+    Строит ленты существующих подписчиков, как rebuild_feeds:
+    FEED_MAX_ENTRIES последних рецептов непопулярных авторов.
+    """
+    FeedEntry = apps.get_model('recipes', 'FeedEntry')
+    rows = apps.get_model('users', 'Subscription').objects.filter(
+        author__followers_count__lte=FEED_FANOUT_MAX_FOLLOWERS,
+        author__recipes__isnull=False,
+    ).annotate(
+        row_number=Window(
+            expression=RowNumber(),
+            partition_by=[F('user_id')],
+            order_by=[
+                F('author__recipes__pub_date').desc(),
+                F('author__recipes__id').desc(),
+            ],
+        )
+    ).order_by().values_list(
+        'user_id', 'author__recipes__id', 'author_id',
+        'author__recipes__pub_date', 'row_number',
+    )
+    entries = []
+    for user_id, recipe_id, author_id, pub_date, row_number in (
+        rows.iterator()
+    ):
+        if row_number > FEED_MAX_ENTRIES:
+            continue
+        entries.append(FeedEntry(
+            user_id=user_id, recipe_id=recipe_id,
+            author_id=author_id, pub_date=pub_date,
+        ))
+        if len(entries) == BATCH_SIZE:
+            FeedEntry.objects.bulk_create(entries)
+            entries = []
+    FeedEntry.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0008_shoppinglistitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recipes.recipe')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Записи ленты',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['user', '-pub_date', '-recipe'], name='feed_user_pub_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_feed_entry'),
+        ),
+        migrations.RunPython(backfill_feeds, migrations.RunPython.noop),
+    ]
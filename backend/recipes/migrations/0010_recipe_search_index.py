@@ -0,0 +1,34 @@
+# Generated by Django 3.2.3 on 2026-10-17 15:00
+
+from django.db import migrations
+
+# Выражение должно совпадать с SearchVector('name', 'text',
+# config='russian') из recipes.search.PostgresSearchBackend.
+CREATE_INDEX = '''
+CREATE INDEX IF NOT EXISTS recipe_search_idx ON recipes_recipe
+USING GIN (to_tsvector(
+    'russian'::regconfig,
+    COALESCE(name, '') || ' ' || COALESCE(text, '')
+))
+'''
+DROP_INDEX = 'DROP INDEX IF EXISTS recipe_search_idx'
+
+
+def run_on_postgres(sql):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_feedentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgres(CREATE_INDEX), run_on_postgres(DROP_INDEX)
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.3 on 2026-10-17 16:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_recipe_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarRecipe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_recipes', to='recipes.recipe')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipes.recipe')),
+            ],
+            options={
+                'verbose_name': 'Похожий рецепт',
+                'verbose_name_plural': 'Похожие рецепты',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='similarrecipe',
+            index=models.Index(fields=['recipe', '-score'], name='similar_recipe_score_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='similarrecipe',
+            constraint=models.UniqueConstraint(fields=('recipe', 'similar'), name='unique_similar_recipe'),
+        ),
+    ]
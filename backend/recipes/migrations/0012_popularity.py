@@ -0,0 +1,63 @@
+# Generated by Django 3.2.3 on 2026-10-17 17:00
+
+from datetime import timedelta
+
+from django.db import migrations, models
+import django.utils.timezone
+
+# Существующим связям AddField запишет время выполнения миграции,
+# и они выглядели бы свежими событиями. Их переносят за окно трендов
+# (TRENDING_WINDOW_DAYS = 14 дней на момент миграции):
+# в популярности они учитываются одинаково, в трендах — нет.
+BACKFILL_AGE = timedelta(days=15)
+
+
+def backfill_created(apps, schema_editor):
+    created = django.utils.timezone.now() - BACKFILL_AGE
+    for name in ('Favorite', 'ShoppingCart'):
+        apps.get_model('recipes', name).objects.update(created=created)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_similarrecipe'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='favorite',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=django.utils.timezone.now, verbose_name='Добавлено'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='popularity_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Популярность'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Набирает популярность'),
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=django.utils.timezone.now, verbose_name='Добавлено'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-popularity_score', '-id'], name='recipe_popularity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-trending_score', '-id'], name='recipe_trending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['cooking_time', '-id'], name='recipe_cooking_time_idx'),
+        ),
+        migrations.RunPython(backfill_created, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.3 on 2026-10-17 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_popularity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Набор данных')),
+                ('content_hash', models.CharField(max_length=64, verbose_name='Хеш содержимого')),
+                ('rows', models.PositiveIntegerField(verbose_name='Строк')),
+                ('loaded_at', models.DateTimeField(auto_now=True, verbose_name='Загружено')),
+            ],
+            options={
+                'verbose_name': 'Загрузка данных',
+                'verbose_name_plural': 'Загрузки данных',
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.3 on 2026-10-17 19:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_dataimport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarRecipeRefresh',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='recipes.recipe')),
+            ],
+            options={
+                'verbose_name': 'Пересчёт похожих рецептов',
+                'verbose_name_plural': 'Пересчёт похожих рецептов',
+            },
+        ),
+    ]
@@ -6,6 +6,7 @@ from recipes.constants import (
     INGREDIENT_NAME_MAX_LENGTH,
     MEASUREMENT_UNIT_MAX_LENGTH,
 )
+from users.models import DenormalizedFieldsMixin
 
 User = get_user_model()
 
@@ -46,7 +47,7 @@ class Ingredient(models.Model):
         return f'{self.name}, {self.measurement_unit}'
 
 
-class Recipe(models.Model):
+class Recipe(DenormalizedFieldsMixin, models.Model):
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -57,6 +58,12 @@ class Recipe(models.Model):
     image = models.ImageField(
         'Изображение', upload_to='recipes/', blank=True, null=True
     )
+    image_variants_source = models.CharField(
+        'Изображение с готовыми вариантами',
+        max_length=255,
+        blank=True,
+        editable=False,
+    )
     text = models.TextField('Описание')
     cooking_time = models.PositiveIntegerField('Время приготовления (мин)')
     tags = models.ManyToManyField(Tag)
@@ -66,11 +73,46 @@ class Recipe(models.Model):
     )
 
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    favorites_count = models.PositiveIntegerField('В избранном', default=0)
+    shopping_cart_count = models.PositiveIntegerField(
+        'В списках покупок', default=0
+    )
+    popularity_score = models.FloatField(
+        'Популярность', default=0, editable=False
+    )
+    trending_score = models.FloatField(
+        'Набирает популярность', default=0, editable=False
+    )
+    denormalized_fields = (
+        'favorites_count', 'shopping_cart_count',
+        'popularity_score', 'trending_score',
+    )
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['-popularity_score', '-id'],
+                name='recipe_popularity_idx'
+            ),
+            models.Index(
+                fields=['-trending_score', '-id'],
+                name='recipe_trending_idx'
+            ),
+            models.Index(
+                fields=['cooking_time', '-id'],
+                name='recipe_cooking_time_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -104,6 +146,9 @@ class UserRecipeRelation(models.Model):
         on_delete=models.CASCADE,
         related_name='%(class)s_related'
     )
+    created = models.DateTimeField(
+        'Добавлено', auto_now_add=True, db_index=True
+    )
 
     class Meta:
         abstract = True
@@ -129,3 +174,134 @@ class ShoppingCart(UserRecipeRelation):
     class Meta(UserRecipeRelation.Meta):
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Списки покупок'
+
+
+class ShoppingListItem(models.Model):
+    """
+    Суммарное количество ингредиента в списке покупок пользователя.
+    Материализованный итог ShoppingCart и IngredientInRecipe,
+    поддерживается recipes.shopping_list.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items'
+    )
+    ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE)
+    total_amount = models.PositiveIntegerField('Количество')
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Позиции списков покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_item'
+            )
+        ]
+
+
+class FeedEntry(models.Model):
+    """
+    Запись ленты подписок: рецепт автора, на которого подписан
+    пользователь. Заполняется при публикации (см. recipes.feed),
+    pub_date и author копируются из рецепта для выборки по индексу.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-recipe'],
+                name='feed_user_pub_date_idx'
+            ),
+        ]
+
+
+class SimilarRecipe(models.Model):
+    """
+    Похожий рецепт: один из SIMILAR_RECIPES_LIMIT соседей рецепта
+    по мере Жаккара на множествах ингредиентов и тегов.
+    Заполняется заранее (см. recipes.similarity).
+    """
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_recipes'
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField('Сходство')
+
+    class Meta:
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'similar'],
+                name='unique_similar_recipe'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['recipe', '-score'],
+                name='similar_recipe_score_idx'
+            ),
+        ]
+
+
+class SimilarRecipeRefresh(models.Model):
+    """
+    Очередь рецептов, у которых изменились теги или ингредиенты:
+    их соседей пересчитывает команда refresh_similar.
+    """
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+'
+    )
+
+    class Meta:
+        verbose_name = 'Пересчёт похожих рецептов'
+        verbose_name_plural = 'Пересчёт похожих рецептов'
+
+
+class DataImport(models.Model):
+    """
+    Последняя загрузка справочных данных командой load:
+    по хешу содержимого повторная загрузка тех же данных пропускается.
+    """
+    name = models.CharField('Набор данных', max_length=50, unique=True)
+    content_hash = models.CharField('Хеш содержимого', max_length=64)
+    rows = models.PositiveIntegerField('Строк')
+    loaded_at = models.DateTimeField('Загружено', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Загрузка данных'
+        verbose_name_plural = 'Загрузки данных'
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,90 @@
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDay
+from django.utils import timezone
+
+from recipes.constants import (
+    FAVORITE_WEIGHT,
+    POPULARITY_HALF_LIFE_DAYS,
+    SHOPPING_CART_WEIGHT,
+    TRENDING_HALF_LIFE_DAYS,
+    TRENDING_WINDOW_DAYS,
+)
+from recipes.models import Favorite, Recipe, ShoppingCart
+
+RELATION_WEIGHTS = (
+    (Favorite, FAVORITE_WEIGHT),
+    (ShoppingCart, SHOPPING_CART_WEIGHT),
+)
+
+
+def decay(age, half_life_days):
+    """Множитель затухания для события возраста age (timedelta)."""
+    return 0.5 ** (max(age / timedelta(days=half_life_days), 0))
+
+
+def compute_scores(now, recipe_ids=None):
+    """
+    Рейтинги рецептов на момент now: {id рецепта: (popularity,
+    trending)}. События сворачиваются базой в счётчики по рецептам
+    и дням, затухание считается для середины дня.
+    Если передан recipe_ids, считаются только эти рецепты.
+    """
+    trending_since = now - timedelta(days=TRENDING_WINDOW_DAYS)
+    scores = defaultdict(lambda: [0.0, 0.0])
+    for model, weight in RELATION_WEIGHTS:
+        relations = model.objects.all()
+        if recipe_ids is not None:
+            relations = relations.filter(recipe_id__in=recipe_ids)
+        buckets = relations.annotate(
+            day=TruncDay('created')
+        ).values('recipe_id', 'day').annotate(
+            events=Count('id')
+        ).order_by().values_list('recipe_id', 'day', 'events')
+        for recipe_id, day, events in buckets.iterator():
+            age = now - day - timedelta(hours=12)
+            score = scores[recipe_id]
+            score[0] += weight * events * decay(
+                age, POPULARITY_HALF_LIFE_DAYS
+            )
+            if day + timedelta(days=1) > trending_since:
+                score[1] += weight * events * decay(
+                    age, TRENDING_HALF_LIFE_DAYS
+                )
+    return scores
+
+
+def rollup_popularity(now=None, chunk_size=1000):
+    """
+    Пересчитывает popularity_score и trending_score всех рецептов
+    порциями по chunk_size: в памяти держатся рейтинги одной порции.
+    Рецепты без событий получают нулевые рейтинги.
+    Возвращает число рецептов с ненулевым рейтингом.
+    """
+    now = now or timezone.now()
+    recipe_ids = Recipe.objects.order_by('pk').values_list(
+        'pk', flat=True
+    ).iterator(chunk_size=chunk_size)
+    total = 0
+    while True:
+        chunk = list(islice(recipe_ids, chunk_size))
+        if not chunk:
+            return total
+        scores = compute_scores(now, chunk)
+        updated = []
+        for recipe_id in chunk:
+            popularity, trending = scores.get(recipe_id, (0, 0))
+            updated.append(Recipe(
+                pk=recipe_id,
+                popularity_score=popularity,
+                trending_score=trending,
+            ))
+        with transaction.atomic():
+            Recipe.objects.bulk_update(
+                updated, ['popularity_score', 'trending_score']
+            )
+        total += len(scores)
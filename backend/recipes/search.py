@@ -0,0 +1,217 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, FloatField, Value, When
+from django.utils.module_loading import import_string
+
+from api.cache import RECIPES_VERSION, get_versions
+from recipes.models import Recipe
+
+SEARCH_CONFIG = 'russian'
+SEARCH_MAX_RESULTS = 500
+WORD_RE = re.compile(r'\w+')
+RUSSIAN_ENDINGS = sorted((
+    'ами', 'ями', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ой', 'ей',
+    'ий', 'ый', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ия', 'ом', 'ем', 'ах',
+    'ях', 'ов', 'ев', 'ам', 'ям', 'ую', 'юю', 'а', 'я', 'о', 'е', 'ы', 'и',
+    'у', 'ю', 'ь',
+), key=len, reverse=True)
+# Гласные, й и ь в конце основы: «описани-я» и «описан-ие»
+# должны давать одну основу.
+RUSSIAN_STEM_TAIL = 'аеиоуыэюяйь'
+STEM_MIN_LENGTH = 3
+# Частые служебные слова, которые словарь russian не индексирует.
+RUSSIAN_STOP_WORDS = frozenset((
+    'а', 'без', 'в', 'во', 'да', 'для', 'до', 'же', 'за', 'и', 'из', 'или',
+    'к', 'ко', 'на', 'над', 'не', 'ни', 'но', 'о', 'об', 'от', 'по', 'под',
+    'при', 'с', 'со', 'то', 'у',
+))
+
+
+def stem(word):
+    """
+    Упрощённый стемминг: отбрасывает падежное окончание, затем
+    оставшиеся гласные на конце основы.
+    """
+    for ending in RUSSIAN_ENDINGS:
+        if (
+            word.endswith(ending)
+            and len(word) - len(ending) >= STEM_MIN_LENGTH
+        ):
+            word = word[:-len(ending)]
+            break
+    while len(word) > STEM_MIN_LENGTH and word[-1] in RUSSIAN_STEM_TAIL:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """
+    Слова текста в нормальной форме: нижний регистр, ё/е, без
+    служебных слов, с отброшенными окончаниями. Используется
+    и для индексации, и для запросов.
+    """
+    return [
+        stem(word)
+        for word in WORD_RE.findall(text.casefold().replace('ё', 'е'))
+        if word not in RUSSIAN_STOP_WORDS
+    ]
+
+
+class PostgresSearchBackend:
+    """
+    Полнотекстовый поиск PostgreSQL: to_tsvector с конфигурацией
+    russian по названию и описанию. Выражение совпадает с GIN-индексом
+    recipe_search_idx (миграция 0010), поэтому поиск идёт по индексу.
+    """
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import (
+            SearchQuery,
+            SearchRank,
+            SearchVector,
+        )
+        vector = SearchVector('name', 'text', config=SEARCH_CONFIG)
+        search_query = SearchQuery(
+            query, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.annotate(
+            search_vector=vector,
+            search_rank=SearchRank(vector, search_query),
+        ).filter(search_vector=search_query).order_by(
+            '-search_rank', '-pub_date', '-id'
+        )
+
+    def update(self, recipe):
+        """Индекс в базе обновляется самой базой."""
+
+    def remove(self, recipe_id):
+        """Индекс в базе обновляется самой базой."""
+
+
+class InMemorySearchBackend:
+    """
+    Инвертированный индекс в памяти процесса для SQLite и разработки:
+    слово -> {id рецепта: число вхождений}. Строится при первом
+    поиске и перестраивается при смене счётчика поколений рецептов,
+    поэтому видит записи из всех процессов. Ранжирование — TF-IDF,
+    название весит больше.
+    """
+    name_weight = 3
+
+    def __init__(self):
+        self._version = None
+        self._postings = None
+        self._documents = {}
+        self._lock = threading.RLock()
+
+    def _terms(self, name, text):
+        terms = Counter(tokenize(text))
+        for token in tokenize(name):
+            terms[token] += self.name_weight
+        return terms
+
+    def _add(self, recipe_id, name, text):
+        terms = self._terms(name, text)
+        self._documents[recipe_id] = terms
+        for token, count in terms.items():
+            self._postings[token][recipe_id] = count
+
+    def _ensure_built(self):
+        version, = get_versions(RECIPES_VERSION)
+        with self._lock:
+            if self._postings is not None and self._version == version:
+                return
+            self._version = version
+            self._postings = defaultdict(dict)
+            self._documents = {}
+            rows = Recipe.objects.values_list('id', 'name', 'text')
+            for recipe_id, name, text in rows.iterator():
+                self._add(recipe_id, name, text)
+
+    def rank(self, query):
+        """
+        Id рецептов, содержащих все слова запроса (как websearch
+        в PostgreSQL), и их релевантность, лучшие первыми.
+        """
+        self._ensure_built()
+        tokens = set(tokenize(query))
+        if not tokens:
+            return []
+        with self._lock:
+            total = len(self._documents) or 1
+            postings = [self._postings.get(token, {}) for token in tokens]
+            postings.sort(key=len)
+            matched = set(postings[0])
+            for recipe_ids in postings[1:]:
+                matched.intersection_update(recipe_ids)
+            scores = dict.fromkeys(matched, 0.0)
+            for recipe_ids in postings:
+                if not recipe_ids:
+                    continue
+                idf = math.log(1 + total / len(recipe_ids))
+                for recipe_id in matched:
+                    scores[recipe_id] += (
+                        1 + math.log(recipe_ids[recipe_id])
+                    ) * idf
+        return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+
+    def search(self, queryset, query):
+        """
+        Не больше SEARCH_MAX_RESULTS самых релевантных рецептов
+        из queryset. Найденные в индексе рецепты проверяются
+        по queryset порциями, поэтому ограничение применяется
+        к уже отфильтрованным рецептам.
+        """
+        candidates = self.rank(query)
+        allowed_queryset = queryset.order_by().prefetch_related(None)
+        ranked = []
+        for start in range(0, len(candidates), SEARCH_MAX_RESULTS):
+            chunk = candidates[start:start + SEARCH_MAX_RESULTS]
+            allowed = set(allowed_queryset.filter(
+                pk__in=[pk for pk, _ in chunk]
+            ).values_list('pk', flat=True))
+            ranked.extend(item for item in chunk if item[0] in allowed)
+            if len(ranked) >= SEARCH_MAX_RESULTS:
+                break
+        ranked = ranked[:SEARCH_MAX_RESULTS]
+        return queryset.filter(pk__in=[pk for pk, _ in ranked]).annotate(
+            search_rank=Case(
+                *[When(pk=pk, then=Value(score)) for pk, score in ranked],
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+        ).order_by('-search_rank', '-pub_date', '-id')
+
+    def update(self, recipe):
+        """Индекс перестраивается по счётчику поколений рецептов."""
+
+    def remove(self, recipe_id):
+        """Индекс перестраивается по счётчику поколений рецептов."""
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_search_backend():
+    """
+    Бэкенд поиска из настройки RECIPE_SEARCH_BACKEND (путь к классу).
+    Если она не задана, выбирается по базе данных.
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            path = settings.RECIPE_SEARCH_BACKEND
+            if path is None:
+                path = (
+                    'recipes.search.PostgresSearchBackend'
+                    if connection.vendor == 'postgresql'
+                    else 'recipes.search.InMemorySearchBackend'
+                )
+            _backend = import_string(path)()
+        return _backend
@@ -0,0 +1,114 @@
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from recipes.models import IngredientInRecipe, ShoppingCart, ShoppingListItem
+
+
+def _scope(user_field, ingredient_field, user_ids, ingredient_ids):
+    scope = Q()
+    if user_ids is not None:
+        scope &= Q(**{f'{user_field}__in': user_ids})
+    if ingredient_ids is not None:
+        scope &= Q(**{f'{ingredient_field}__in': ingredient_ids})
+    return scope
+
+
+def expected_totals(user_ids=None, ingredient_ids=None):
+    """
+    Итоги (user_id, ingredient_id) -> количество, посчитанные по корзинам.
+    None в аргументах означает «без ограничения».
+    """
+    rows = ShoppingCart.objects.filter(
+        _scope(
+            'user_id', 'recipe__ingredientinrecipe__ingredient_id',
+            user_ids, ingredient_ids
+        ),
+        recipe__ingredientinrecipe__isnull=False,
+    ).values_list(
+        'user_id', 'recipe__ingredientinrecipe__ingredient_id'
+    ).annotate(
+        total=Sum('recipe__ingredientinrecipe__amount')
+    ).order_by()
+    return {(user_id, ingredient_id): total
+            for user_id, ingredient_id, total in rows}
+
+
+def sync_shopping_list(user_ids=None, ingredient_ids=None, dry_run=False):
+    """
+    Приводит строки ShoppingListItem в заданной области к итогам
+    по корзинам: добавляет недостающие, исправляет количество,
+    удаляет лишние. Пересчитываются только затронутые пары
+    пользователь-ингредиент, повторный вызов ничего не меняет.
+    Возвращает число исправленных строк.
+    """
+    if user_ids is not None and not user_ids:
+        return 0
+    if ingredient_ids is not None and not ingredient_ids:
+        return 0
+    with transaction.atomic():
+        expected = expected_totals(user_ids, ingredient_ids)
+        stale = []
+        removed = []
+        for item in ShoppingListItem.objects.filter(_scope(
+            'user_id', 'ingredient_id', user_ids, ingredient_ids
+        )).only('pk', 'user_id', 'ingredient_id', 'total_amount'):
+            total = expected.pop((item.user_id, item.ingredient_id), None)
+            if total is None:
+                removed.append(item.pk)
+            elif item.total_amount != total:
+                item.total_amount = total
+                stale.append(item)
+        created = [
+            ShoppingListItem(
+                user_id=user_id, ingredient_id=ingredient_id,
+                total_amount=total
+            )
+            for (user_id, ingredient_id), total in expected.items()
+        ]
+        if not dry_run:
+            if removed:
+                ShoppingListItem.objects.filter(pk__in=removed).delete()
+            if stale:
+                ShoppingListItem.objects.bulk_update(stale, ['total_amount'])
+            if created:
+                ShoppingListItem.objects.bulk_create(
+                    created, ignore_conflicts=True
+                )
+    return len(removed) + len(stale) + len(created)
+
+
+def sync_recipe_ingredients(recipe_ids, ingredient_ids=None):
+    """
+    Пересчитывает списки покупок пользователей, у которых рецепты
+    лежат в корзине, после изменения ингредиентов этих рецептов.
+    """
+    if ingredient_ids is not None and not ingredient_ids:
+        return 0
+    user_ids = list(ShoppingCart.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('user_id', flat=True).distinct())
+    if ingredient_ids is None:
+        ingredient_ids = list(IngredientInRecipe.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('ingredient_id', flat=True).distinct())
+    return sync_shopping_list(user_ids, ingredient_ids)
+
+
+def sync_cart_recipes(user_ids, recipe_ids):
+    """
+    Пересчитывает списки покупок пользователей после добавления
+    рецептов в корзину или удаления из неё.
+    """
+    ingredient_ids = list(IngredientInRecipe.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('ingredient_id', flat=True).distinct())
+    return sync_shopping_list(user_ids, ingredient_ids)
+
+
+def shopping_list_rows(user):
+    """Строки списка покупок (название, единица, количество) по алфавиту."""
+    return ShoppingListItem.objects.filter(user=user).values_list(
+        'ingredient__name', 'ingredient__measurement_unit', 'total_amount'
+    ).order_by(
+        'ingredient__name', 'ingredient__measurement_unit'
+    )
@@ -0,0 +1,177 @@
+import threading
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.feed import fan_out
+from recipes.models import (
+    Favorite,
+    IngredientInRecipe,
+    Recipe,
+    ShoppingCart,
+    SimilarRecipeRefresh,
+)
+from recipes.search import get_search_backend
+from recipes.similarity import queue_similar_refresh
+from recipes.shopping_list import (
+    sync_cart_recipes,
+    sync_recipe_ingredients,
+    sync_shopping_list,
+)
+
+User = get_user_model()
+
+RELATION_COUNTERS = {
+    Favorite: 'favorites_count',
+    ShoppingCart: 'shopping_cart_count',
+}
+
+_muted = threading.local()
+
+
+@contextmanager
+def muted_signals(*models):
+    """
+    Отключает в текущем потоке обработчики сигналов моделей,
+    которые обновляют производные данные. Используется пакетными
+    операциями, которые обновляют эти данные сами одним вызовом.
+    """
+    previous = getattr(_muted, 'models', frozenset())
+    _muted.models = previous | frozenset(models)
+    try:
+        yield
+    finally:
+        _muted.models = previous
+
+
+def is_muted(model):
+    """Отключены ли обработчики сигналов модели (muted_signals)."""
+    return model in getattr(_muted, 'models', ())
+
+
+def update_recipe_counter(model, recipe_ids, delta):
+    """Изменяет счётчик связей пользователь-рецепт у рецептов на delta."""
+    field = RELATION_COUNTERS[model]
+    Recipe.objects.filter(pk__in=recipe_ids).update(
+        **{field: F(field) + delta}
+    )
+
+
+def user_recipes_changed(model, user_id, recipe_ids, delta):
+    """
+    Обновляет производные данные после добавления (delta=1)
+    или удаления (delta=-1) связей пользователя с рецептами:
+    счётчики рецептов и итоги списка покупок. Вызывается сигналами
+    и пакетными операциями, которые сигналов не отправляют.
+    """
+    update_recipe_counter(model, recipe_ids, delta)
+    if model is ShoppingCart:
+        sync_cart_recipes([user_id], recipe_ids)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def add_user_recipe(sender, instance, created, **kwargs):
+    if created and not is_muted(sender):
+        user_recipes_changed(
+            sender, instance.user_id, [instance.recipe_id], 1
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def remove_user_recipe(sender, instance, **kwargs):
+    if is_muted(sender):
+        return
+    user_recipes_changed(sender, instance.user_id, [instance.recipe_id], -1)
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(sender, instance, created, **kwargs):
+    if created:
+        User.objects.filter(pk=instance.author_id).update(
+            recipes_count=F('recipes_count') + 1
+        )
+
+
+@receiver(post_save, sender=Recipe)
+def publish_to_feeds(sender, instance, created, **kwargs):
+    """Раскладывает новый рецепт по лентам подписчиков после коммита."""
+    if created:
+        transaction.on_commit(lambda: fan_out(instance))
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe(sender, instance, **kwargs):
+    """Обновляет рецепт в индексе поиска после коммита."""
+    transaction.on_commit(lambda: get_search_backend().update(instance))
+
+
+@receiver(post_delete, sender=Recipe)
+def unindex_recipe(sender, instance, **kwargs):
+    recipe_id = instance.pk
+    transaction.on_commit(lambda: get_search_backend().remove(recipe_id))
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(sender, instance, **kwargs):
+    User.objects.filter(pk=instance.author_id).update(
+        recipes_count=F('recipes_count') - 1
+    )
+
+
+@receiver(post_save, sender=IngredientInRecipe)
+def update_shopping_lists(sender, instance, created, **kwargs):
+    """
+    Новая строка меняет только свой ингредиент. При изменении
+    существующей мог смениться и сам ингредиент, поэтому списки
+    покупок затронутых пользователей пересчитываются целиком.
+    """
+    if created:
+        sync_recipe_ingredients([instance.recipe_id], [instance.ingredient_id])
+        return
+    sync_shopping_list(list(ShoppingCart.objects.filter(
+        recipe_id=instance.recipe_id
+    ).values_list('user_id', flat=True)))
+
+
+@receiver(post_delete, sender=IngredientInRecipe)
+def remove_from_shopping_lists(sender, instance, **kwargs):
+    if is_muted(sender):
+        return
+    sync_recipe_ingredients([instance.recipe_id], [instance.ingredient_id])
+
+
+@receiver(post_save, sender=IngredientInRecipe)
+@receiver(post_delete, sender=IngredientInRecipe)
+def queue_similar_by_ingredients(sender, instance, **kwargs):
+    """Ставит рецепт в очередь пересчёта похожих (refresh_similar)."""
+    if is_muted(sender):
+        return
+    queue_similar_refresh([instance.recipe_id])
+
+
+@receiver(post_delete, sender=Recipe)
+def dequeue_similar(sender, instance, **kwargs):
+    """
+    Убирает удалённый рецепт из очереди пересчёта: каскадное удаление
+    его ингредиентов ставит рецепт в очередь уже после её очистки.
+    """
+    SimilarRecipeRefresh.objects.filter(recipe_id=instance.pk).delete()
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def queue_similar_by_tags(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    """
+    Ставит в очередь пересчёта похожих рецепты, у которых
+    действительно изменились теги.
+    """
+    if action in ('post_add', 'post_remove') and pk_set:
+        queue_similar_refresh(pk_set if reverse else [instance.pk])
+    elif action == 'post_clear' and not reverse:
+        queue_similar_refresh([instance.pk])
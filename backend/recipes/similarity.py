@@ -0,0 +1,198 @@
+import heapq
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count
+
+from recipes.constants import SIMILAR_MAX_POSTINGS, SIMILAR_RECIPES_LIMIT
+from recipes.models import (
+    IngredientInRecipe,
+    Recipe,
+    SimilarRecipe,
+    SimilarRecipeRefresh,
+)
+
+
+def load_features(recipe_ids=None):
+    """
+    Разреженные строки матрицы рецепт x признак: множества
+    id ингредиентов и id тегов со знаком минус.
+    """
+    features = defaultdict(set)
+    ingredients = IngredientInRecipe.objects.values_list(
+        'recipe_id', 'ingredient_id'
+    )
+    tags = Recipe.tags.through.objects.values_list('recipe_id', 'tag_id')
+    if recipe_ids is not None:
+        ingredients = ingredients.filter(recipe_id__in=recipe_ids)
+        tags = tags.filter(recipe_id__in=recipe_ids)
+    for recipe_id, ingredient_id in ingredients.order_by().iterator():
+        features[recipe_id].add(ingredient_id)
+    for recipe_id, tag_id in tags.order_by().iterator():
+        features[recipe_id].add(-tag_id)
+    return features
+
+
+def build_postings(features, ingredient_ids=None):
+    """
+    Столбцы матрицы по ингредиентам: id ингредиента -> рецепты.
+    Слишком частые ингредиенты (больше SIMILAR_MAX_POSTINGS рецептов)
+    отбрасываются: они делают кандидатами почти все рецепты.
+    """
+    postings = defaultdict(list)
+    for recipe_id, items in features.items():
+        for item in items:
+            if item > 0 and (ingredient_ids is None or item in ingredient_ids):
+                postings[item].append(recipe_id)
+    return {
+        item: recipes for item, recipes in postings.items()
+        if len(recipes) <= SIMILAR_MAX_POSTINGS
+    }
+
+
+def neighbour_scores(recipe_id, features, postings):
+    """
+    Мера Жаккара рецепта со всеми рецептами, у которых есть
+    общий ингредиент из postings: {id рецепта: сходство}.
+    """
+    items = features.get(recipe_id)
+    if not items:
+        return {}
+    candidates = set()
+    for item in items:
+        candidates.update(postings.get(item, ()))
+    candidates.discard(recipe_id)
+    scores = {}
+    for other in candidates:
+        other_items = features[other]
+        shared = len(items & other_items)
+        scores[other] = shared / (len(items) + len(other_items) - shared)
+    return scores
+
+
+def top_neighbours(scores):
+    """SIMILAR_RECIPES_LIMIT самых похожих: пары (id рецепта, сходство)."""
+    return heapq.nlargest(
+        SIMILAR_RECIPES_LIMIT,
+        scores.items(),
+        key=lambda item: (item[1], -item[0])
+    )
+
+
+def _write(rows):
+    """Заменяет соседей рецептов из rows: {id рецепта: [(id, сходство)]}."""
+    SimilarRecipe.objects.filter(recipe_id__in=list(rows)).delete()
+    SimilarRecipe.objects.bulk_create(
+        SimilarRecipe(recipe_id=recipe_id, similar_id=similar_id, score=score)
+        for recipe_id, neighbours in rows.items()
+        for similar_id, score in neighbours
+    )
+
+
+def rebuild_similar(chunk_size=1000):
+    """
+    Пересчитывает соседей всех рецептов. Матрица признаков целиком
+    держится в памяти, соседи заменяются пачками по chunk_size
+    рецептов, поэтому во время пересчёта списки не пустеют.
+    Рецепты без ингредиентов и тегов теряют соседей.
+    Возвращает число рецептов.
+    """
+    features = load_features()
+    postings = build_postings(features)
+    recipe_ids = list(
+        Recipe.objects.order_by('pk').values_list('pk', flat=True)
+    )
+    for start in range(0, len(recipe_ids), chunk_size):
+        with transaction.atomic():
+            _write({
+                recipe_id: top_neighbours(
+                    neighbour_scores(recipe_id, features, postings)
+                )
+                for recipe_id in recipe_ids[start:start + chunk_size]
+            })
+    return len(recipe_ids)
+
+
+def refresh_similar(recipe_ids):
+    """
+    Пересчитывает соседей изменённых рецептов и обновляет их место
+    в списках рецептов, с которыми у них есть общие ингредиенты
+    или которые ссылались на них раньше. Загружаются только эти
+    рецепты; если изменённый рецепт выпал из чужого списка,
+    список остаётся короче до полного пересчёта (rebuild_similar).
+    """
+    recipe_ids = set(recipe_ids)
+    rare = set(
+        IngredientInRecipe.objects.filter(
+            ingredient_id__in=IngredientInRecipe.objects.filter(
+                recipe_id__in=recipe_ids
+            ).values('ingredient_id')
+        ).values('ingredient_id').annotate(
+            recipes=Count('id')
+        ).filter(recipes__lte=SIMILAR_MAX_POSTINGS).values_list(
+            'ingredient_id', flat=True
+        )
+    )
+    affected = set(
+        IngredientInRecipe.objects.filter(
+            ingredient_id__in=rare
+        ).values_list('recipe_id', flat=True).distinct()
+    ) | set(
+        SimilarRecipe.objects.filter(
+            similar_id__in=recipe_ids
+        ).values_list('recipe_id', flat=True)
+    )
+    affected -= recipe_ids
+    features = load_features(recipe_ids | affected)
+    postings = build_postings(features, rare)
+
+    current = defaultdict(dict)
+    for recipe_id, similar_id, score in SimilarRecipe.objects.filter(
+        recipe_id__in=affected
+    ).values_list('recipe_id', 'similar_id', 'score').iterator():
+        current[recipe_id][similar_id] = score
+    rows = {}
+    for recipe_id in recipe_ids:
+        scores = neighbour_scores(recipe_id, features, postings)
+        rows[recipe_id] = top_neighbours(scores)
+        for other in affected:
+            current[other].pop(recipe_id, None)
+            if other in scores:
+                current[other][recipe_id] = scores[other]
+    for other in affected:
+        rows[other] = top_neighbours(current[other])
+    with transaction.atomic():
+        _write(rows)
+
+
+def queue_similar_refresh(recipe_ids):
+    """
+    Ставит рецепты в очередь на пересчёт соседей одним запросом.
+    Сам пересчёт выполняет команда refresh_similar вне запроса.
+    """
+    SimilarRecipeRefresh.objects.bulk_create(
+        [SimilarRecipeRefresh(recipe_id=pk) for pk in recipe_ids],
+        ignore_conflicts=True
+    )
+
+
+def process_similar_queue(chunk_size=100):
+    """
+    Пересчитывает соседей рецептов из очереди пачками по chunk_size.
+    Пачка убирается из очереди до пересчёта, поэтому изменения,
+    сделанные во время пересчёта, снова попадут в очередь.
+    Возвращает число пересчитанных рецептов.
+    """
+    total = 0
+    while True:
+        with transaction.atomic():
+            recipe_ids = list(
+                SimilarRecipeRefresh.objects.order_by('pk').values_list(
+                    'pk', flat=True
+                )[:chunk_size]
+            )
+            SimilarRecipeRefresh.objects.filter(pk__in=recipe_ids).delete()
+        if not recipe_ids:
+            return total
+        refresh_similar(recipe_ids)
+        total += len(recipe_ids)
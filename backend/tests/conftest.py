@@ -0,0 +1,148 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    IngredientInRecipe,
+    Recipe,
+    ShoppingCart,
+    Tag,
+)
+from users.models import Subscription, User
+
+
+@pytest.fixture(autouse=True)
+def test_settings(settings, tmp_path):
+    """
+    Без кеша ответов, фоновой обработки изображений и задержки
+    перестроения индекса подбора по ингредиентам.
+    Тесты идут в одном процессе, поэтому кеш в памяти.
+    """
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    settings.RESPONSE_CACHE_ENABLED = False
+    settings.IMAGE_VARIANTS_ENABLED = False
+    settings.PANTRY_INDEX_MAX_STALENESS = 0
+    settings.MEDIA_ROOT = tmp_path
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def png():
+    """Картинка 1x1 в base64 для полей изображений."""
+    return (
+        'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABAQMAAAAl21bK'
+        'AAAAA1BMVEUAAACnej3aAAAAAXRSTlMAQObYZgAAAApJREFUCNdjYAAAAAIAAeIhvDMA'
+        'AAAASUVORK5CYII='
+    )
+
+
+def create_user(username):
+    return User.objects.create_user(
+        username=username,
+        email=f'{username}@example.com',
+        password='password',
+        first_name=username,
+        last_name=username,
+    )
+
+
+@pytest.fixture
+def author(db):
+    return create_user('author')
+
+
+@pytest.fixture
+def user(db):
+    return create_user('user')
+
+
+@pytest.fixture
+def anon_client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def author_client(author):
+    client = APIClient()
+    client.force_authenticate(author)
+    return client
+
+
+@pytest.fixture
+def tags(db):
+    return [
+        Tag.objects.create(name=name, slug=slug)
+        for name, slug in (
+            ('Завтрак', 'breakfast'),
+            ('Обед', 'lunch'),
+            ('Ужин', 'dinner'),
+        )
+    ]
+
+
+@pytest.fixture
+def ingredients(db):
+    return [
+        Ingredient.objects.create(name=name, measurement_unit=unit)
+        for name, unit in (
+            ('картофель', 'г'),
+            ('морковь', 'г'),
+            ('молоко', 'мл'),
+            ('соль', 'г'),
+            ('яйцо', 'шт'),
+            ('мука', 'г'),
+        )
+    ]
+
+
+def create_recipe(author, name, tags, ingredients, cooking_time=10,
+                  text='Описание рецепта'):
+    recipe = Recipe.objects.create(
+        author=author, name=name, text=text, cooking_time=cooking_time
+    )
+    recipe.tags.set(tags)
+    IngredientInRecipe.objects.bulk_create(
+        IngredientInRecipe(recipe=recipe, ingredient=ingredient, amount=10)
+        for ingredient in ingredients
+    )
+    return recipe
+
+
+@pytest.fixture
+def recipes(author, user, tags, ingredients):
+    """
+    Восемь рецептов автора с разными тегами и ингредиентами;
+    пользователь подписан на автора, часть рецептов у него
+    в избранном и в списке покупок.
+    """
+    recipes = [
+        create_recipe(
+            author,
+            f'Рецепт {number}',
+            tags[:number % 3 + 1],
+            ingredients[number % 3:number % 3 + 3],
+            cooking_time=5 * (number + 1),
+        )
+        for number in range(8)
+    ]
+    Subscription.objects.create(user=user, author=author)
+    for recipe in recipes[::2]:
+        Favorite.objects.create(user=user, recipe=recipe)
+    for recipe in recipes[:3]:
+        ShoppingCart.objects.create(user=user, recipe=recipe)
+    return recipes
@@ -0,0 +1,81 @@
+import pytest
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from recipes.shopping_list import sync_shopping_list
+from users.models import Subscription, User
+
+
+def statuses(response):
+    return {item['id']: item['status'] for item in response.data['results']}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url, model, counter', (
+    ('/api/recipes/favorite/batch/', Favorite, 'favorites_count'),
+    ('/api/recipes/shopping_cart/batch/', ShoppingCart,
+     'shopping_cart_count'),
+))
+def test_recipe_batch_keeps_counters(user_client, user, recipes, url, model,
+                                     counter):
+    ids = [recipe.pk for recipe in recipes[:5]] + [10 ** 6]
+    existing = set(
+        model.objects.filter(user=user).values_list('recipe_id', flat=True)
+    )
+
+    response = user_client.post(url, {'ids': ids}, format='json')
+    assert response.status_code == 200
+    assert statuses(response) == {
+        **{
+            pk: 'exists' if pk in existing else 'created'
+            for pk in ids[:-1]
+        },
+        10 ** 6: 'not_found',
+    }
+
+    response = user_client.delete(url, {'ids': ids[:3]}, format='json')
+    assert response.status_code == 200
+    assert set(statuses(response).values()) == {'deleted'}
+
+    for recipe in Recipe.objects.all():
+        assert getattr(recipe, counter) == model.objects.filter(
+            recipe=recipe
+        ).count()
+    assert not model.objects.filter(user=user, recipe_id__in=ids[:3]).exists()
+    assert sync_shopping_list(dry_run=True) == 0
+
+
+@pytest.mark.django_db
+def test_subscribe_batch_keeps_counters(user_client, user, author):
+    others = [
+        User.objects.create_user(
+            username=f'author{number}',
+            email=f'author{number}@example.com',
+            password='password',
+        )
+        for number in range(3)
+    ]
+    ids = [author.pk] + [other.pk for other in others] + [user.pk]
+    Subscription.objects.create(user=user, author=author)
+
+    response = user_client.post(
+        '/api/users/subscribe/batch/', {'ids': ids}, format='json'
+    )
+    assert response.status_code == 200
+    assert statuses(response) == {
+        author.pk: 'exists',
+        **{other.pk: 'created' for other in others},
+        user.pk: 'not_found',
+    }
+    response = user_client.delete(
+        '/api/users/subscribe/batch/', {'ids': ids[:2]}, format='json'
+    )
+    assert response.status_code == 200
+    assert set(statuses(response).values()) == {'deleted'}
+
+    user.refresh_from_db()
+    assert user.following_count == 2
+    for other in [author, *others]:
+        other.refresh_from_db()
+        assert other.followers_count == Subscription.objects.filter(
+            author=other
+        ).count()
@@ -0,0 +1,66 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.management.commands.bench import ENDPOINTS, Command
+from recipes.datagen import generate_dataset
+
+# Потолок числа SQL-запросов на эндпоинт: число запросов
+# не должно зависеть от размера данных и страницы.
+QUERY_BUDGETS = {
+    'recipes_list': 5,
+    'recipes_list_tags': 5,
+    'recipes_favorited': 6,
+    'recipes_in_cart': 6,
+    'recipe_detail': 5,
+    'recipe_similar': 1,
+    'subscriptions': 4,
+    'feed': 5,
+    'download_shopping_cart': 2,
+    'ingredients_search': 0,
+    'pantry': 4,
+}
+# Грубый потолок медианы времени ответа на маленьком наборе данных.
+MAX_MEDIAN_MS = 500
+REPEAT = 3
+
+
+@pytest.fixture
+def measure(settings, tags, ingredients):
+    settings.REQUEST_METRICS_SAMPLE_RATE = 0
+
+    def measure(users, recipes):
+        user_ids = generate_dataset(users=users, recipes=recipes)
+        call_command('rebuild_similar', stdout=StringIO())
+        return Command().measure_endpoints(user_ids, REPEAT)
+    return measure
+
+
+def test_budgets_cover_all_endpoints():
+    assert set(QUERY_BUDGETS) == {endpoint for endpoint, _, _ in ENDPOINTS}
+
+
+@pytest.mark.django_db
+def test_endpoints_within_budget(measure):
+    results = measure(users=20, recipes=100)
+    for endpoint, result in results.items():
+        assert result['status'] == 200, endpoint
+        assert result['queries'] <= QUERY_BUDGETS[endpoint], (
+            endpoint, result['queries']
+        )
+        assert result['median_ms'] <= MAX_MEDIAN_MS, (
+            endpoint, result['median_ms']
+        )
+    # Тело выгрузки читается при замере: токен и строки списка.
+    assert results['download_shopping_cart']['queries'] == 2
+
+
+@pytest.mark.django_db
+def test_query_count_does_not_grow_with_data(measure):
+    small = measure(users=10, recipes=40)
+    large = measure(users=40, recipes=200)
+    for endpoint in small:
+        assert large[endpoint]['queries'] <= small[endpoint]['queries'], (
+            endpoint, small[endpoint]['queries'], large[endpoint]['queries']
+        )
@@ -0,0 +1,21 @@
+import pytest
+
+from api.checks import check_shared_cache
+
+LOCMEM = 'django.core.cache.backends.locmem.LocMemCache'
+DATABASE = 'django.core.cache.backends.db.DatabaseCache'
+
+
+@pytest.mark.parametrize('backend, debug, errors', (
+    (LOCMEM, False, ['api.E001']),
+    (LOCMEM, True, []),
+    (DATABASE, False, []),
+))
+def test_check_shared_cache(settings, monkeypatch, backend, debug,
+                            errors):
+    settings.DEBUG = debug
+    # Без сигнала setting_changed: кеш тестов остаётся прежним.
+    monkeypatch.setitem(settings.CACHES['default'], 'BACKEND', backend)
+    assert [
+        error.id for error in check_shared_cache(None)
+    ] == errors
@@ -0,0 +1,72 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from django.utils.http import http_date, parse_http_date
+
+import api.cache
+
+
+@pytest.fixture
+def recipe(recipes):
+    return recipes[0]
+
+
+def write(recipe, capture):
+    """Сохраняет рецепт и выполняет отложенную смену версий."""
+    with capture(execute=True):
+        recipe.save()
+
+
+@pytest.mark.django_db
+def test_not_modified(anon_client, recipe):
+    url = f'/api/recipes/{recipe.pk}/'
+    etag = anon_client.get(url)['ETag']
+    response = anon_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response['ETag'] == etag
+    assert not response.content
+
+
+@pytest.mark.django_db
+def test_etag_changes_after_write(anon_client, recipe,
+                                  django_capture_on_commit_callbacks):
+    url = f'/api/recipes/{recipe.pk}/'
+    etag = anon_client.get(url)['ETag']
+    write(recipe, django_capture_on_commit_callbacks)
+    response = anon_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_etag_per_user(anon_client, user_client, recipe):
+    url = f'/api/recipes/{recipe.pk}/'
+    assert anon_client.get(url)['ETag'] != user_client.get(url)['ETag']
+
+
+@pytest.mark.django_db
+def test_etag_shared_between_users(anon_client, user_client, tags):
+    assert (
+        anon_client.get('/api/tags/')['ETag']
+        == user_client.get('/api/tags/')['ETag']
+    )
+
+
+@pytest.mark.django_db
+def test_last_modified(anon_client, recipe, monkeypatch,
+                       django_capture_on_commit_callbacks):
+    url = '/api/recipes/'
+    last_modified = anon_client.get(url)['Last-Modified']
+    response = anon_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == 304
+
+    later = parse_http_date(last_modified) + 60
+    monkeypatch.setattr(api.cache, 'time', SimpleNamespace(
+        time=lambda: later
+    ))
+    write(recipe, django_capture_on_commit_callbacks)
+    monkeypatch.setattr(api.cache, 'time', time)
+    response = anon_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == 200
+    assert response['Last-Modified'] == http_date(later)
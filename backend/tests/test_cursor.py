@@ -0,0 +1,94 @@
+from urllib.parse import urlsplit
+
+import pytest
+from django.utils import timezone
+
+from api.filters import RECIPE_ORDERINGS
+from recipes.feed import feed_queryset, rebuild_feeds
+from recipes.models import Recipe
+from users.models import Subscription
+
+# Больше offset_cutoff (1000) стандартной курсорной пагинации DRF.
+TIED_RECIPES = 1050
+PAGE_SIZE = 100
+
+
+@pytest.fixture
+def tied_recipes(author):
+    """Рецепты с одинаковыми датой, рейтингами и временем."""
+    pub_date = timezone.now()
+    Recipe.objects.bulk_create(
+        Recipe(
+            author=author, name=f'Рецепт {number}', text='Описание',
+            cooking_time=10, pub_date=pub_date,
+        )
+        for number in range(TIED_RECIPES)
+    )
+    Recipe.objects.update(pub_date=pub_date)
+    return list(Recipe.objects.values_list('pk', flat=True))
+
+
+def walk(client, url, link='next'):
+    """id рецептов со всех страниц по ссылкам link."""
+    ids, pages = [], 0
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        ids.extend(item['id'] for item in response.data['results'])
+        url = response.data[link]
+        if url:
+            parts = urlsplit(url)
+            url = f'{parts.path}?{parts.query}'
+        pages += 1
+        assert pages <= TIED_RECIPES // PAGE_SIZE + 2
+    return ids
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('pipeline', ('serializer', 'values'))
+@pytest.mark.parametrize('ordering', RECIPE_ORDERINGS)
+def test_cursor_walks_tied_orderings(anon_client, tied_recipes, settings,
+                                     pipeline, ordering):
+    settings.RECIPE_READ_PIPELINE = pipeline
+    ids = walk(
+        anon_client,
+        f'/api/recipes/?ordering={ordering}&limit={PAGE_SIZE}&cursor='
+    )
+    assert ids == list(Recipe.objects.order_by(
+        *RECIPE_ORDERINGS[ordering]
+    ).values_list('pk', flat=True))
+
+
+@pytest.mark.django_db
+def test_cursor_walks_back(anon_client, tied_recipes):
+    url = f'/api/recipes/?ordering=popular&limit={PAGE_SIZE}&cursor='
+    last = None
+    while url:
+        response = anon_client.get(url)
+        last, url = response, response.data['next']
+    back = walk(anon_client, last.data['previous'], link='previous')
+    expected = list(Recipe.objects.order_by(
+        *RECIPE_ORDERINGS['popular']
+    ).values_list('pk', flat=True))
+    pages = [
+        expected[start:start + PAGE_SIZE]
+        for start in range(0, len(expected), PAGE_SIZE)
+    ]
+    assert back == [pk for page in reversed(pages[:-1]) for pk in page]
+
+
+@pytest.mark.django_db
+def test_invalid_cursor(anon_client, tied_recipes):
+    # p=nope: позиция не JSON.
+    response = anon_client.get('/api/recipes/?cursor=cD1ub3Bl')
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_feed_walks_tied_ordering(user_client, user, author, tied_recipes):
+    Subscription.objects.create(user=user, author=author)
+    rebuild_feeds([user.pk])
+    ids = walk(user_client, '/api/recipes/feed/?ordering=quickest&limit=50')
+    assert ids == list(feed_queryset(user).order_by(
+        *RECIPE_ORDERINGS['quickest']
+    ).values_list('pk', flat=True))
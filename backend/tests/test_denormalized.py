@@ -0,0 +1,62 @@
+import pytest
+from django.db.models import F
+
+from api.views import RecipeViewSet
+from recipes.models import Recipe
+from users.models import User
+
+RECIPE_COUNTERS = {
+    'favorites_count': 5,
+    'shopping_cart_count': 3,
+    'popularity_score': 1.5,
+    'trending_score': 0.5,
+}
+
+
+@pytest.mark.django_db
+def test_patch_keeps_recipe_counters(author_client, recipes, monkeypatch):
+    recipe = recipes[0]
+    get_object = RecipeViewSet.get_object
+
+    def get_object_then_bump(view):
+        instance = get_object(view)
+        Recipe.objects.filter(pk=instance.pk).update(**{
+            name: F(name) + delta
+            for name, delta in RECIPE_COUNTERS.items()
+        })
+        return instance
+
+    before = Recipe.objects.values(*RECIPE_COUNTERS).get(pk=recipe.pk)
+    monkeypatch.setattr(RecipeViewSet, 'get_object', get_object_then_bump)
+    response = author_client.patch(f'/api/recipes/{recipe.pk}/', {
+        'name': 'Новое название',
+        'text': recipe.text,
+        'cooking_time': recipe.cooking_time,
+        'tags': [tag.pk for tag in recipe.tags.all()],
+        'ingredients': [
+            {'id': item.ingredient_id, 'amount': item.amount}
+            for item in recipe.ingredientinrecipe_set.all()
+        ],
+    }, format='json')
+    assert response.status_code == 200
+    recipe.refresh_from_db()
+    assert recipe.name == 'Новое название'
+    for name, delta in RECIPE_COUNTERS.items():
+        assert getattr(recipe, name) == before[name] + delta
+
+
+@pytest.mark.django_db
+def test_password_change_keeps_user_counters(user_client, user):
+    User.objects.filter(pk=user.pk).update(
+        recipes_count=2, followers_count=3, following_count=4
+    )
+    response = user_client.post(
+        '/api/users/set_password/',
+        {'current_password': 'password', 'new_password': 'new-password'},
+    )
+    assert response.status_code == 204
+    user.refresh_from_db()
+    assert user.check_password('new-password')
+    assert (
+        user.recipes_count, user.followers_count, user.following_count
+    ) == (2, 3, 4)
@@ -0,0 +1,106 @@
+import csv
+import json
+import tempfile
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+
+import pytest
+from openpyxl import load_workbook
+
+import api.exports
+from api.exports import EXPORT_HEADER, EXPORT_TITLE
+from recipes.shopping_list import shopping_list_rows
+
+URL = '/api/recipes/download_shopping_cart/'
+
+
+def download(client, export_format):
+    response = client.get(URL, {'format': export_format})
+    assert response.status_code == 200
+    assert response.streaming
+    assert response['Content-Disposition'] == (
+        f'attachment; filename="shopping_cart.{export_format}"'
+    )
+    return b''.join(response.streaming_content)
+
+
+def parse(content, export_format):
+    """Строки выгрузки без заголовка."""
+    if export_format == 'txt':
+        lines = content.decode().splitlines()
+        assert lines[:2] == [f'{EXPORT_TITLE}:', '']
+        return lines[2:]
+    if export_format == 'csv':
+        rows = list(csv.reader(StringIO(content.decode('utf-8-sig'))))
+        assert tuple(rows[0]) == EXPORT_HEADER
+        return [tuple(row) for row in rows[1:]]
+    if export_format == 'json':
+        return [
+            (item['name'], item['measurement_unit'], item['amount'])
+            for item in json.loads(content)
+        ]
+    rows = list(
+        load_workbook(BytesIO(content)).active.iter_rows(values_only=True)
+    )
+    assert rows[0] == EXPORT_HEADER
+    return rows[1:]
+
+
+def expected(user, export_format):
+    rows = list(shopping_list_rows(user))
+    if export_format == 'txt':
+        return [f'{name} ({unit}) — {amount}' for name, unit, amount in rows]
+    if export_format == 'csv':
+        return [(name, unit, str(amount)) for name, unit, amount in rows]
+    return rows
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('export_format', ('txt', 'csv', 'json', 'xlsx'))
+def test_export_formats(user_client, user, recipes, export_format):
+    rows = parse(download(user_client, export_format), export_format)
+    assert rows
+    assert rows == expected(user, export_format)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('export_format', ('txt', 'csv', 'json', 'xlsx'))
+def test_export_empty_cart(author_client, recipes, export_format):
+    assert parse(download(author_client, export_format), export_format) == []
+
+
+@pytest.mark.django_db
+def test_export_default_txt(user_client, user, recipes):
+    response = user_client.get(URL)
+    assert response['Content-Type'] == 'text/plain; charset=utf-8'
+    assert parse(b''.join(response.streaming_content), 'txt') == expected(
+        user, 'txt'
+    )
+
+
+@pytest.mark.django_db
+def test_export_unknown_format(user_client, recipes):
+    assert user_client.get(URL, {'format': 'pdf'}).status_code == 404
+
+
+@pytest.mark.django_db
+def test_export_requires_auth(anon_client):
+    assert anon_client.get(URL, {'format': 'csv'}).status_code == 401
+
+
+@pytest.mark.django_db
+def test_xlsx_temp_file_closed(user_client, recipes, monkeypatch):
+    files = []
+
+    def track_temporary_file():
+        files.append(tempfile.TemporaryFile())
+        return files[-1]
+
+    monkeypatch.setattr(api.exports, 'tempfile', SimpleNamespace(
+        TemporaryFile=track_temporary_file
+    ))
+    response = user_client.get(URL, {'format': 'xlsx'})
+    assert len(files) == 1
+    assert not files[0].closed
+    b''.join(response.streaming_content)
+    assert files[0].closed
@@ -0,0 +1,82 @@
+import pytest
+
+from recipes import feed
+from recipes.models import FeedEntry, Recipe
+
+FEED_URL = '/api/recipes/feed/'
+
+
+def feed_ids(client):
+    response = client.get(FEED_URL)
+    assert response.status_code == 200
+    return [item['id'] for item in response.data['results']]
+
+
+def newest_first(recipes):
+    return [
+        recipe.pk for recipe in sorted(
+            recipes, key=lambda recipe: (recipe.pub_date, recipe.pk),
+            reverse=True,
+        )
+    ]
+
+
+@pytest.mark.django_db
+def test_feed_requires_auth(anon_client):
+    assert anon_client.get(FEED_URL).status_code == 401
+
+
+@pytest.mark.django_db
+def test_feed_ordering(user_client, recipes):
+    assert feed_ids(user_client) == newest_first(recipes)[:6]
+
+
+@pytest.mark.django_db
+def test_fan_out_on_create(author_client, user_client, user, recipes, tags,
+                           ingredients, png,
+                           django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        response = author_client.post('/api/recipes/', {
+            'name': 'Новый рецепт',
+            'text': 'Описание',
+            'cooking_time': 5,
+            'image': png,
+            'tags': [tags[0].pk],
+            'ingredients': [{'id': ingredients[0].pk, 'amount': 10}],
+        }, format='json')
+    assert response.status_code == 201
+    assert FeedEntry.objects.filter(
+        user=user, recipe_id=response.data['id']
+    ).exists()
+    assert feed_ids(user_client)[0] == response.data['id']
+
+
+@pytest.mark.django_db
+def test_unsubscribe_removes_entries(user_client, user, author, recipes):
+    response = user_client.delete(f'/api/users/{author.pk}/subscribe/')
+    assert response.status_code == 204
+    assert not FeedEntry.objects.filter(user=user).exists()
+    assert feed_ids(user_client) == []
+
+    response = user_client.post(f'/api/users/{author.pk}/subscribe/')
+    assert response.status_code == 201
+    assert feed_ids(user_client) == newest_first(recipes)[:6]
+
+
+@pytest.mark.django_db
+def test_delete_removes_entry(author_client, user_client, recipes):
+    newest = newest_first(recipes)[0]
+    response = author_client.delete(f'/api/recipes/{newest}/')
+    assert response.status_code == 204
+    assert newest not in feed_ids(user_client)
+    assert not FeedEntry.objects.filter(recipe_id=newest).exists()
+
+
+@pytest.mark.django_db
+def test_popular_author_read_time(user_client, recipes, monkeypatch):
+    # Все авторы популярны: рецепты подмешиваются при чтении.
+    monkeypatch.setattr(feed, 'FEED_FANOUT_MAX_FOLLOWERS', 0)
+    FeedEntry.objects.all().delete()
+    assert feed_ids(user_client) == newest_first(
+        Recipe.objects.all()
+    )[:6]
@@ -0,0 +1,98 @@
+import pytest
+from django.core.files.base import ContentFile
+
+from api.images import IMAGE_VARIANTS, variant_name
+from recipes.models import Recipe
+
+
+def build_variants(instance, field, source):
+    """Кладёт в хранилище варианты текущего изображения, как пул."""
+    image = getattr(instance, field)
+    for variant in IMAGE_VARIANTS:
+        image.storage.save(
+            variant_name(image.name, variant), ContentFile(b'variant')
+        )
+    type(instance).objects.filter(pk=instance.pk).update(
+        **{source: image.name}
+    )
+    instance.refresh_from_db()
+    return image.name
+
+
+def variants_exist(storage, name):
+    return [
+        storage.exists(variant_name(name, variant))
+        for variant in IMAGE_VARIANTS
+    ]
+
+
+@pytest.fixture
+def recipe(recipes):
+    recipe = recipes[0]
+    recipe.refresh_from_db()
+    recipe.image.save('photo.png', ContentFile(b'image'))
+    return recipe
+
+
+@pytest.mark.django_db
+def test_replacing_recipe_image_deletes_variants(
+    author_client, recipe, tags, ingredients, png,
+    django_capture_on_commit_callbacks
+):
+    old = build_variants(recipe, 'image', 'image_variants_source')
+    data = {
+        'name': recipe.name,
+        'text': recipe.text,
+        'cooking_time': recipe.cooking_time,
+        'tags': [tags[0].pk],
+        'ingredients': [{'id': ingredients[0].pk, 'amount': 10}],
+        'image': png,
+    }
+    with django_capture_on_commit_callbacks(execute=True):
+        response = author_client.patch(
+            f'/api/recipes/{recipe.pk}/', data, format='json'
+        )
+    assert response.status_code == 200
+    assert variants_exist(recipe.image.storage, old) == [False] * 3
+    recipe.refresh_from_db()
+    assert recipe.image.name != old
+    assert recipe.image_variants_source == ''
+
+
+@pytest.mark.django_db
+def test_saving_recipe_keeps_current_variants(
+    recipe, django_capture_on_commit_callbacks
+):
+    name = build_variants(recipe, 'image', 'image_variants_source')
+    with django_capture_on_commit_callbacks(execute=True):
+        recipe.save()
+    assert variants_exist(recipe.image.storage, name) == [True] * 3
+
+
+@pytest.mark.django_db
+def test_deleting_recipe_deletes_variants(
+    author_client, recipe, django_capture_on_commit_callbacks
+):
+    name = build_variants(recipe, 'image', 'image_variants_source')
+    with django_capture_on_commit_callbacks(execute=True):
+        response = author_client.delete(f'/api/recipes/{recipe.pk}/')
+    assert response.status_code == 204
+    assert not Recipe.objects.filter(pk=recipe.pk).exists()
+    assert variants_exist(recipe.image.storage, name) == [False] * 3
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('method', ('put', 'delete'))
+def test_avatar_change_deletes_variants(
+    user_client, user, png, method, django_capture_on_commit_callbacks
+):
+    user.avatar.save('avatar.png', ContentFile(b'image'))
+    old = build_variants(user, 'avatar', 'avatar_variants_source')
+    with django_capture_on_commit_callbacks(execute=True):
+        response = getattr(user_client, method)(
+            '/api/users/me/avatar/', {'avatar': png}, format='json'
+        )
+    assert response.status_code in (200, 204)
+    assert variants_exist(user.avatar.storage, old) == [False] * 3
+    user.refresh_from_db()
+    assert user.avatar_variants_source == ''
@@ -0,0 +1,69 @@
+import pytest
+
+from recipes.models import Ingredient
+
+NAMES = (
+    'Соль морская', 'соль', 'солод', 'сок лимонный', 'Ёжевика', 'морковь',
+)
+
+
+@pytest.fixture
+def catalog(db):
+    return {
+        name: Ingredient.objects.create(name=name, measurement_unit='г')
+        for name in NAMES
+    }
+
+
+def names(client, query):
+    response = client.get(f'/api/ingredients/?{query}')
+    assert response.status_code == 200
+    return [item['name'] for item in response.json()]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query, expected', (
+    ('name=соль', ['соль', 'Соль морская']),
+    ('name=СОЛ', ['солод', 'соль', 'Соль морская']),
+    ('name=со', ['сок лимонный', 'солод', 'соль', 'Соль морская']),
+    ('name=еж', ['Ёжевика']),
+    ('name=ананас', []),
+))
+def test_prefix_ordering(anon_client, catalog, query, expected):
+    assert names(anon_client, query) == expected
+
+
+@pytest.mark.django_db
+def test_prefix_item(anon_client, catalog):
+    ingredient = catalog['соль']
+    assert anon_client.get('/api/ingredients/?name=соль').json()[0] == {
+        'id': ingredient.pk,
+        'name': 'соль',
+        'measurement_unit': 'г',
+    }
+
+
+@pytest.mark.django_db
+def test_rebuild_after_ingredient_write(anon_client, catalog,
+                                        django_capture_on_commit_callbacks):
+    assert names(anon_client, 'name=мор') == ['морковь']
+    with django_capture_on_commit_callbacks(execute=True):
+        Ingredient.objects.create(name='морошка', measurement_unit='г')
+        catalog['морковь'].delete()
+    assert names(anon_client, 'name=мор') == ['морошка']
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query, expected', (
+    ('q=морквь', 'морковь'),
+    ('q=сольь', 'соль'),
+    ('q=ежевикка', 'Ёжевика'),
+    ('q=лимоный сок', 'сок лимонный'),
+))
+def test_fuzzy_typo(anon_client, catalog, query, expected):
+    assert names(anon_client, query)[0] == expected
+
+
+@pytest.mark.django_db
+def test_fuzzy_no_match(anon_client, catalog):
+    assert names(anon_client, 'q=ананас') == []
@@ -0,0 +1,48 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+
+from recipes.management.commands.load import iter_json_array
+from recipes.models import Ingredient
+
+INGREDIENTS = [
+    {'name': f'ингредиент «{number}»', 'measurement_unit': 'г'}
+    for number in range(500)
+]
+
+
+@pytest.mark.parametrize('read_size', (1, 7, 4096))
+def test_iter_json_array_matches_json_load(read_size):
+    text = json.dumps(INGREDIENTS, ensure_ascii=False, indent=1)
+    assert list(iter_json_array(io.StringIO(text), read_size)) == INGREDIENTS
+
+
+@pytest.mark.parametrize('text, expected', (
+    ('[]', []),
+    (' [ 12345 , "a]", {"b": [1]} ] ', [12345, 'a]', {'b': [1]}]),
+))
+def test_iter_json_array_values(text, expected):
+    assert list(iter_json_array(io.StringIO(text), read_size=2)) == expected
+
+
+@pytest.mark.parametrize('text', ('{}', '[1 2]', '[1,', '[1,]', ''))
+def test_iter_json_array_rejects_invalid(text):
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(text), read_size=2))
+
+
+@pytest.mark.django_db
+def test_load_json_lines(tmp_path):
+    path = tmp_path / 'ingredients.jsonl'
+    path.write_text(
+        '{"name": "соль", "measurement_unit": "г"}\n'
+        '\n'
+        '{"name": "вода", "measurement_unit": "мл"}\n',
+        encoding='utf-8'
+    )
+    call_command('load', path=str(path), stdout=io.StringIO())
+    assert set(Ingredient.objects.values_list('name', flat=True)) == {
+        'соль', 'вода'
+    }
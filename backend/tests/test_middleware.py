@@ -0,0 +1,69 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture
+def metrics_log(settings, caplog):
+    """Метрики каждого запроса из лога api.middleware."""
+    settings.REQUEST_METRICS_SAMPLE_RATE = 1
+    caplog.set_level('INFO', logger='api.middleware')
+    return lambda: [
+        json.loads(record.getMessage()) for record in caplog.records
+        if record.name == 'api.middleware'
+    ]
+
+
+@pytest.mark.django_db
+def test_metrics_logged(anon_client, recipes, metrics_log):
+    with CaptureQueriesContext(connection) as queries:
+        response = anon_client.get('/api/recipes/')
+    entry, = metrics_log()
+    assert entry['action'] == 'RecipeViewSet.list'
+    assert entry['status'] == 200
+    assert entry['queries'] == len(queries)
+    assert entry['size'] == len(response.content)
+    assert entry['db_ms'] <= entry['total_ms']
+    assert 'Server-Timing' not in response
+
+
+@pytest.mark.django_db
+def test_server_timing_setting(anon_client, recipes, metrics_log, settings):
+    settings.REQUEST_METRICS_SERVER_TIMING = True
+    response = anon_client.get('/api/recipes/')
+    entry, = metrics_log()
+    timing = response['Server-Timing']
+    assert 'db;dur=' in timing
+    assert f'desc="{entry["queries"]} queries"' in timing
+    assert 'total;dur=' in timing
+
+
+@pytest.mark.django_db
+def test_not_sampled(anon_client, recipes, metrics_log, settings):
+    settings.REQUEST_METRICS_SAMPLE_RATE = 0
+    settings.REQUEST_METRICS_SERVER_TIMING = True
+    response = anon_client.get('/api/recipes/')
+    assert metrics_log() == []
+    assert 'Server-Timing' not in response
+
+
+@pytest.mark.django_db
+def test_streaming_queries_counted(user_client, recipes, metrics_log,
+                                   settings):
+    settings.REQUEST_METRICS_SERVER_TIMING = True
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.get(
+            '/api/recipes/download_shopping_cart/', {'format': 'csv'}
+        )
+        before_body = len(queries)
+        assert metrics_log() == []
+        content = b''.join(response.streaming_content)
+    assert content
+    # Строки списка покупок читаются при отдаче тела.
+    assert len(queries) > before_body
+    entry, = metrics_log()
+    assert entry['queries'] == len(queries)
+    assert entry['size'] is None
+    assert 'Server-Timing' not in response
@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.utils import timezone
+
+from recipes.constants import TRENDING_WINDOW_DAYS
+from recipes.popularity import compute_scores
+
+BEFORE = [('recipes', '0011_similarrecipe')]
+AFTER = [('recipes', '0012_popularity')]
+BEFORE_FEED = [('recipes', '0008_shoppinglistitem')]
+AFTER_FEED = [('recipes', '0009_feedentry')]
+
+
+def migrate(targets):
+    executor = MigrationExecutor(connection)
+    executor.loader.build_graph()
+    executor.migrate(targets)
+    return executor.loader.project_state(targets).apps
+
+
+@pytest.fixture
+def latest_after():
+    """Возвращает базу к последним миграциям для следующих тестов."""
+    yield
+    executor = MigrationExecutor(connection)
+    executor.migrate(executor.loader.graph.leaf_nodes())
+
+
+@pytest.mark.django_db(transaction=True)
+def test_existing_relations_are_not_trending(author, user, latest_after):
+    apps = migrate(BEFORE)
+    Recipe = apps.get_model('recipes', 'Recipe')
+    recipe = Recipe.objects.create(
+        author_id=author.pk, name='Рецепт', text='Описание',
+        cooking_time=10
+    )
+    for name in ('Favorite', 'ShoppingCart'):
+        apps.get_model('recipes', name).objects.create(
+            user_id=user.pk, recipe_id=recipe.pk
+        )
+
+    apps = migrate(AFTER)
+    now = timezone.now()
+    for name in ('Favorite', 'ShoppingCart'):
+        created = apps.get_model('recipes', name).objects.get().created
+        assert created < now - timedelta(days=TRENDING_WINDOW_DAYS)
+    popularity, trending = compute_scores(now)[recipe.pk]
+    assert popularity > 0
+    assert trending == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_existing_subscriptions_get_feeds(author, user, latest_after):
+    apps = migrate(BEFORE_FEED)
+    Recipe = apps.get_model('recipes', 'Recipe')
+    recipe_ids = [
+        Recipe.objects.create(
+            author_id=author.pk, name=f'Рецепт {number}',
+            text='Описание', cooking_time=10
+        ).pk
+        for number in range(3)
+    ]
+    apps.get_model('users', 'Subscription').objects.create(
+        user_id=user.pk, author_id=author.pk
+    )
+
+    apps = migrate(AFTER_FEED)
+    entries = apps.get_model('recipes', 'FeedEntry').objects.order_by(
+        '-pub_date', '-recipe_id'
+    ).values_list('user_id', 'author_id', 'recipe_id')
+    assert list(entries) == [
+        (user.pk, author.pk, recipe_id)
+        for recipe_id in reversed(recipe_ids)
+    ]
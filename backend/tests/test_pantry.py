@@ -0,0 +1,87 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import api.pantry
+from api.pantry import pantry_index
+from recipes.models import IngredientInRecipe, Recipe
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('extra', ('', '&cursor=', '&cursor=abc&page=1'))
+def test_pantry_ignores_cursor(anon_client, recipes, ingredients, extra):
+    response = anon_client.get(
+        f'/api/recipes/pantry/?ingredients={ingredients[0].pk}'
+        f'&limit=2{extra}'
+    )
+    assert response.status_code == 200
+    expected = sum(
+        recipe.ingredientinrecipe_set.filter(
+            ingredient=ingredients[0]
+        ).exists()
+        for recipe in recipes
+    )
+    assert response.data['count'] == expected
+    assert len(response.data['results']) == min(expected, 2)
+    assert response.data['results'][0]['coverage'] > 0
+
+
+def pantry_ids(client, ingredient):
+    response = client.get(
+        f'/api/recipes/pantry/?ingredients={ingredient.pk}&limit=100'
+    )
+    return {item['id'] for item in response.data['results']}
+
+
+def add_recipe(author, ingredient, capture):
+    with capture(execute=True):
+        recipe = Recipe.objects.create(
+            author=author, name='Новый', text='Описание', cooking_time=5
+        )
+        IngredientInRecipe.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=1
+        )
+    return recipe
+
+
+@pytest.mark.django_db
+def test_pantry_rebuilds_after_write(anon_client, author, recipes,
+                                     ingredients,
+                                     django_capture_on_commit_callbacks):
+    before = pantry_ids(anon_client, ingredients[0])
+    recipe = add_recipe(
+        author, ingredients[0], django_capture_on_commit_callbacks
+    )
+    assert pantry_ids(anon_client, ingredients[0]) == before | {recipe.pk}
+
+
+@pytest.mark.django_db
+def test_pantry_staleness_window(anon_client, author, recipes, ingredients,
+                                 settings, monkeypatch,
+                                 django_capture_on_commit_callbacks):
+    settings.PANTRY_INDEX_MAX_STALENESS = 60
+    # Снимок предыдущего теста ещё в окне устаревания.
+    monkeypatch.setattr(pantry_index, '_snapshot', None)
+    before = pantry_ids(anon_client, ingredients[0])
+    recipe = add_recipe(
+        author, ingredients[0], django_capture_on_commit_callbacks
+    )
+    assert pantry_ids(anon_client, ingredients[0]) == before
+
+    later = time.monotonic() + 61
+    monkeypatch.setattr(api.pantry, 'time', SimpleNamespace(
+        monotonic=lambda: later
+    ))
+    assert pantry_ids(anon_client, ingredients[0]) == before | {recipe.pk}
+
+
+@pytest.mark.django_db
+def test_pantry_serves_old_snapshot_during_rebuild(
+    author, recipes, ingredients, django_capture_on_commit_callbacks
+):
+    snapshot = pantry_index.get_snapshot()
+    add_recipe(author, ingredients[0], django_capture_on_commit_callbacks)
+    with pantry_index._lock:
+        assert pantry_index.get_snapshot() is snapshot
+    assert pantry_index.get_snapshot() is not snapshot
@@ -0,0 +1,25 @@
+import pytest
+from django.utils import timezone
+
+from recipes.models import Recipe
+from recipes.popularity import compute_scores, rollup_popularity
+
+
+@pytest.mark.django_db
+def test_rollup_in_chunks(recipes):
+    stale = recipes[7]
+    Recipe.objects.filter(pk=stale.pk).update(
+        popularity_score=10, trending_score=10
+    )
+    now = timezone.now()
+    scores = compute_scores(now)
+
+    assert rollup_popularity(now, chunk_size=3) == len(scores)
+    for pk, popularity, trending in Recipe.objects.values_list(
+        'pk', 'popularity_score', 'trending_score'
+    ):
+        assert (popularity, trending) == pytest.approx(
+            scores.get(pk, (0, 0))
+        )
+    stale.refresh_from_db()
+    assert stale.popularity_score == stale.trending_score == 0
@@ -0,0 +1,53 @@
+import gzip
+import json
+
+import pytest
+
+from recipes.models import Tag
+
+
+def tag_slugs(content):
+    return [tag['slug'] for tag in json.loads(content)]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', ('/api/tags/', '/api/ingredients/'))
+def test_gzip_body(anon_client, tags, ingredients, url):
+    plain = anon_client.get(url)
+    assert 'Content-Encoding' not in plain
+    assert not plain['ETag'].startswith('W/')
+
+    response = anon_client.get(url, HTTP_ACCEPT_ENCODING='br, gzip;q=0.8')
+    assert response['Content-Encoding'] == 'gzip'
+    assert response['ETag'] == 'W/' + plain['ETag']
+    assert gzip.decompress(response.content) == plain.content
+    assert json.loads(plain.content) == anon_client.get(
+        url, {'format': 'json'}
+    ).json()
+    for content in (plain, response):
+        assert 'Accept-Encoding' in content['Vary']
+        assert 'public' in content['Cache-Control']
+
+
+@pytest.mark.django_db
+def test_identity_encoding(anon_client, tags):
+    response = anon_client.get('/api/tags/', HTTP_ACCEPT_ENCODING='br')
+    assert 'Content-Encoding' not in response
+    assert tag_slugs(response.content) == ['breakfast', 'lunch', 'dinner']
+
+
+@pytest.mark.django_db
+def test_rebuild_after_tag_write(anon_client, tags,
+                                 django_capture_on_commit_callbacks):
+    anon_client.get('/api/tags/', HTTP_ACCEPT_ENCODING='gzip')
+    with django_capture_on_commit_callbacks(execute=True):
+        Tag.objects.create(name='Десерт', slug='dessert')
+        tags[0].delete()
+    for encoding in ('', 'gzip'):
+        response = anon_client.get(
+            '/api/tags/', HTTP_ACCEPT_ENCODING=encoding
+        )
+        content = response.content
+        if encoding:
+            content = gzip.decompress(content)
+        assert tag_slugs(content) == ['lunch', 'dinner', 'dessert']
@@ -0,0 +1,89 @@
+import re
+from types import SimpleNamespace
+
+import pytest
+from django.db import connection
+from django.http import QueryDict
+
+from api.filters import RecipeFilter
+from recipes.datagen import generate_dataset
+from recipes.models import Recipe
+from recipes.search import PostgresSearchBackend
+from users.models import User
+
+postgres_only = pytest.mark.skipif(
+    connection.vendor != 'postgresql',
+    reason='Планы запросов проверяются только на PostgreSQL'
+)
+
+FILTER_QUERIES = (
+    'is_favorited=1',
+    'is_in_shopping_cart=1',
+    'author={author}',
+    'is_favorited=1&author={author}',
+    'is_favorited=1&is_in_shopping_cart=1',
+)
+# Индексы, которые должны встретиться в плане для каждого параметра.
+FILTER_INDEXES = {
+    'is_favorited': r'Index Only Scan using unique_favorite_recipe '
+                    r'on recipes_favorite',
+    'is_in_shopping_cart': r'Index Only Scan using '
+                           r'unique_shoppingcart_recipe '
+                           r'on recipes_shoppingcart',
+    'author': r'recipe_author_pub_date_idx',
+}
+
+
+def filtered(user, query):
+    request = SimpleNamespace(user=user, query_params=QueryDict(query))
+    return RecipeFilter(
+        request.query_params, queryset=Recipe.objects.all(), request=request
+    ).qs
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query', FILTER_QUERIES)
+def test_filters_use_exists_without_distinct(user, author, query):
+    sql = str(filtered(user, query.format(author=author.pk)).query)
+    assert 'EXISTS' in sql or 'author_id' in sql
+    assert 'DISTINCT' not in sql
+    assert 'JOIN' not in sql
+
+
+@pytest.fixture
+def plan_user(transactional_db, tags, ingredients):
+    """
+    Данные с актуальной статистикой и картой видимости (для Index Only
+    Scan). Последовательное чтение запрещено, чтобы на маленьких
+    таблицах планировщик выбирал индекс, если он подходит.
+    """
+    user_ids = generate_dataset(users=30, recipes=300)
+    with connection.cursor() as cursor:
+        cursor.execute('VACUUM ANALYZE')
+        cursor.execute('SET enable_seqscan = off')
+    yield User.objects.filter(
+        pk__in=user_ids,
+        favorite_related__isnull=False,
+        shoppingcart_related__isnull=False,
+    ).order_by('pk').first()
+    with connection.cursor() as cursor:
+        cursor.execute('RESET enable_seqscan')
+
+
+@postgres_only
+@pytest.mark.parametrize('query', FILTER_QUERIES)
+def test_filter_plans_use_indexes(plan_user, query):
+    author_id = Recipe.objects.values_list('author_id', flat=True).first()
+    query = query.format(author=author_id)
+    plan = filtered(plan_user, query).explain()
+    assert 'Seq Scan' not in plan, plan
+    for name in QueryDict(query):
+        assert re.search(FILTER_INDEXES[name], plan), plan
+
+
+@postgres_only
+def test_search_plan_uses_gin_index(plan_user):
+    plan = PostgresSearchBackend().search(
+        Recipe.objects.all(), 'рецепт'
+    ).explain()
+    assert 'recipe_search_idx' in plan, plan
@@ -0,0 +1,98 @@
+import pytest
+
+from recipes.models import Ingredient, IngredientInRecipe, ShoppingCart
+from recipes.shopping_list import sync_shopping_list
+
+# Потолок SQL-запросов записи рецепта вместе с колбэками on_commit:
+# он не должен зависеть от числа ингредиентов.
+CREATE_QUERIES = 14
+NOOP_UPDATE_QUERIES = 10
+UPDATE_QUERIES = 29
+
+
+@pytest.fixture
+def many_ingredients(db):
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f'ингредиент {number}', measurement_unit='г')
+        for number in range(60)
+    )
+    return list(Ingredient.objects.order_by('pk'))
+
+
+def payload(tags, amounts):
+    return {
+        'name': 'Рецепт',
+        'text': 'Описание рецепта',
+        'cooking_time': 5,
+        'tags': [tag.pk for tag in tags],
+        'ingredients': [
+            {'id': ingredient.pk, 'amount': amount}
+            for ingredient, amount in amounts
+        ],
+    }
+
+
+@pytest.fixture
+def recipe_id(author_client, user, tags, many_ingredients, png):
+    data = payload(tags[:1], [(item, 10) for item in many_ingredients[:30]])
+    response = author_client.post(
+        '/api/recipes/', {**data, 'image': png}, format='json'
+    )
+    assert response.status_code == 201
+    ShoppingCart.objects.create(user=user, recipe_id=response.data['id'])
+    return response.data['id']
+
+
+@pytest.mark.django_db
+def test_create_queries(author_client, tags, many_ingredients, png,
+                        django_assert_max_num_queries,
+                        django_capture_on_commit_callbacks):
+    data = payload(tags[:2], [(item, 10) for item in many_ingredients[:30]])
+    with django_assert_max_num_queries(CREATE_QUERIES):
+        with django_capture_on_commit_callbacks(execute=True):
+            response = author_client.post(
+                '/api/recipes/', {**data, 'image': png}, format='json'
+            )
+    assert response.status_code == 201
+    assert len(response.data['ingredients']) == 30
+    assert len(response.data['tags']) == 2
+    assert response.data['is_favorited'] is False
+
+
+@pytest.mark.django_db
+def test_noop_update_queries(author_client, recipe_id, tags,
+                             many_ingredients,
+                             django_assert_max_num_queries,
+                             django_capture_on_commit_callbacks):
+    data = payload(tags[:1], [(item, 10) for item in many_ingredients[:30]])
+    with django_assert_max_num_queries(NOOP_UPDATE_QUERIES):
+        with django_capture_on_commit_callbacks(execute=True):
+            response = author_client.patch(
+                f'/api/recipes/{recipe_id}/', data, format='json'
+            )
+    assert response.status_code == 200
+    assert response.data['is_in_shopping_cart'] is False
+
+
+@pytest.mark.django_db
+def test_update_queries(author_client, recipe_id, tags, many_ingredients,
+                        django_assert_max_num_queries,
+                        django_capture_on_commit_callbacks):
+    amounts = (
+        [(item, 10) for item in many_ingredients[10:20]]
+        + [(item, 20) for item in many_ingredients[20:30]]
+        + [(item, 5) for item in many_ingredients[30:40]]
+    )
+    data = payload(tags[1:], amounts)
+    with django_assert_max_num_queries(UPDATE_QUERIES):
+        with django_capture_on_commit_callbacks(execute=True):
+            response = author_client.patch(
+                f'/api/recipes/{recipe_id}/', data, format='json'
+            )
+    assert response.status_code == 200
+    assert sorted(
+        IngredientInRecipe.objects.filter(recipe_id=recipe_id).values_list(
+            'ingredient_id', 'amount'
+        )
+    ) == sorted((item.pk, amount) for item, amount in amounts)
+    assert sync_shopping_list(dry_run=True) == 0
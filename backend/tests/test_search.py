@@ -0,0 +1,100 @@
+import pytest
+from django.db import connection
+
+from api.cache import RECIPES_VERSION, bump_version
+from recipes import search
+from recipes.models import Recipe
+from recipes.search import InMemorySearchBackend, PostgresSearchBackend
+
+BACKENDS = (
+    pytest.param(InMemorySearchBackend, id='memory'),
+    pytest.param(
+        PostgresSearchBackend,
+        id='postgres',
+        marks=pytest.mark.skipif(
+            connection.vendor != 'postgresql',
+            reason='Полнотекстовый поиск PostgreSQL'
+        ),
+    ),
+)
+RECIPES = {
+    'chicken': ('Суп с курицей', 'Сварите курицу и морковь.'),
+    'mash': ('Картофельное пюре', 'Пюре из картофеля и молока.'),
+    'milk': ('Молочный суп', 'Суп на молоке с вермишелью.'),
+    'omelette': ('Омлет', 'Подробное описание приготовления.'),
+}
+# Запрос -> рецепты, в которых есть все его слова.
+QUERIES = {
+    'суп': {'chicken', 'milk'},
+    'супа': {'chicken', 'milk'},
+    'курица': {'chicken'},
+    'суп с курицей': {'chicken'},
+    'суп молоко': {'milk'},
+    'пюре': {'mash'},
+    'описания': {'omelette'},
+    'суп ананас': set(),
+}
+
+
+@pytest.fixture
+def search_recipes(author):
+    return {
+        key: Recipe.objects.create(
+            author=author, name=name, text=text, cooking_time=10
+        )
+        for key, (name, text) in RECIPES.items()
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('query', QUERIES)
+def test_backends_agree(search_recipes, backend, query):
+    found = set(backend().search(Recipe.objects.all(), query).values_list(
+        'pk', flat=True
+    ))
+    assert found == {search_recipes[key].pk for key in QUERIES[query]}
+
+
+@pytest.fixture
+def memory_backend(monkeypatch):
+    backend = InMemorySearchBackend()
+    monkeypatch.setattr(search, '_backend', backend)
+    return backend
+
+
+@pytest.mark.django_db
+def test_limit_applies_after_filters(anon_client, author, user, monkeypatch,
+                                     memory_backend):
+    monkeypatch.setattr(search, 'SEARCH_MAX_RESULTS', 2)
+    for number in range(3):
+        Recipe.objects.create(
+            author=author, name=f'Суп {number}', text='Суп на бульоне.',
+            cooking_time=10
+        )
+    other = Recipe.objects.create(
+        author=user, name='Обед', text='Суп дня.', cooking_time=10
+    )
+    response = anon_client.get(
+        '/api/recipes/', {'search': 'суп', 'author': user.pk}
+    )
+    assert [item['id'] for item in response.data['results']] == [other.pk]
+    response = anon_client.get('/api/recipes/', {'search': 'суп'})
+    assert response.data['count'] == 2
+
+
+@pytest.mark.django_db
+def test_memory_index_sees_other_process_writes(search_recipes,
+                                                memory_backend):
+    def found(query):
+        return set(memory_backend.search(
+            Recipe.objects.all(), query
+        ).values_list('pk', flat=True))
+
+    recipe = search_recipes['omelette']
+    assert found('борщ') == set()
+    # Запись в другом процессе: сигналы этого процесса её не видят,
+    # меняется только общий счётчик поколений.
+    Recipe.objects.filter(pk=recipe.pk).update(name='Борщ')
+    bump_version(RECIPES_VERSION)
+    assert found('борщ') == {recipe.pk}
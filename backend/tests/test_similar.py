@@ -0,0 +1,122 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from recipes import similarity
+from recipes.models import SimilarRecipe, SimilarRecipeRefresh
+
+
+def recipe_payload(recipe, tags, ingredients, amount=10):
+    return {
+        'name': recipe.name,
+        'text': recipe.text,
+        'cooking_time': recipe.cooking_time,
+        'tags': [tag.pk for tag in tags],
+        'ingredients': [
+            {'id': ingredient.pk, 'amount': amount}
+            for ingredient in ingredients
+        ],
+    }
+
+
+def queued():
+    return set(SimilarRecipeRefresh.objects.values_list('pk', flat=True))
+
+
+@pytest.fixture
+def recipe(recipes):
+    SimilarRecipeRefresh.objects.all().delete()
+    return recipes[0]
+
+
+@pytest.mark.django_db
+def test_amount_change_does_not_queue(author_client, recipe, tags,
+                                      ingredients):
+    payload = recipe_payload(recipe, tags[:1], ingredients[:3], amount=20)
+    response = author_client.patch(
+        f'/api/recipes/{recipe.pk}/', payload, format='json'
+    )
+    assert response.status_code == 200
+    assert queued() == set()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('recipe_tags, recipe_ingredients', (
+    (slice(0, 2), slice(0, 3)),
+    (slice(0, 1), slice(0, 4)),
+    (slice(0, 1), slice(1, 3)),
+))
+def test_composition_change_queues(author_client, recipe, tags, ingredients,
+                                   recipe_tags, recipe_ingredients):
+    payload = recipe_payload(
+        recipe, tags[recipe_tags], ingredients[recipe_ingredients]
+    )
+    response = author_client.patch(
+        f'/api/recipes/{recipe.pk}/', payload, format='json'
+    )
+    assert response.status_code == 200
+    assert queued() == {recipe.pk}
+
+
+@pytest.mark.django_db
+def test_refresh_command_processes_queue(author_client, recipe, recipes,
+                                         tags, ingredients):
+    payload = recipe_payload(recipe, tags, ingredients[3:])
+    author_client.patch(f'/api/recipes/{recipe.pk}/', payload, format='json')
+    call_command('refresh_similar', stdout=StringIO())
+
+    assert queued() == set()
+    neighbours = set(
+        SimilarRecipe.objects.filter(recipe=recipe).values_list(
+            'similar_id', flat=True
+        )
+    )
+    assert neighbours == {
+        other.pk for other in recipes
+        if other != recipe and other.ingredientinrecipe_set.filter(
+            ingredient__in=ingredients[3:]
+        ).exists()
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_deleted_recipe_leaves_queue(author_client, recipe):
+    response = author_client.delete(f'/api/recipes/{recipe.pk}/')
+    assert response.status_code == 204
+    assert recipe.pk not in queued()
+
+
+def neighbour_rows():
+    return set(SimilarRecipe.objects.values_list(
+        'recipe_id', 'similar_id', 'score'
+    ))
+
+
+@pytest.mark.django_db
+def test_rebuild_keeps_rows_visible(recipes, monkeypatch):
+    similarity.rebuild_similar()
+    rows = neighbour_rows()
+    assert rows
+    visible = []
+    write = similarity._write
+
+    def record_write(chunk):
+        visible.append(SimilarRecipe.objects.count())
+        write(chunk)
+
+    monkeypatch.setattr(similarity, '_write', record_write)
+    similarity.rebuild_similar(chunk_size=3)
+    assert len(visible) == 3
+    assert set(visible) == {len(rows)}
+    assert neighbour_rows() == rows
+
+
+@pytest.mark.django_db
+def test_rebuild_clears_recipe_without_features(recipe):
+    similarity.rebuild_similar()
+    assert SimilarRecipe.objects.filter(recipe=recipe).exists()
+    recipe.ingredientinrecipe_set.all().delete()
+    recipe.tags.clear()
+    similarity.rebuild_similar()
+    assert not SimilarRecipe.objects.filter(recipe=recipe).exists()
@@ -0,0 +1,95 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.constants import DEFAULT_RECIPES_LIMIT
+from recipes.models import Recipe
+from users.models import Subscription, User
+
+URL = '/api/users/subscriptions/'
+RECIPES_PER_AUTHOR = 5
+
+
+def create_authors(count, start=0):
+    authors = []
+    for number in range(start, start + count):
+        author = User.objects.create_user(
+            username=f'author{number}', email=f'author{number}@example.com',
+            password='password', first_name='Автор', last_name='Автор',
+        )
+        for recipe in range(RECIPES_PER_AUTHOR):
+            Recipe.objects.create(
+                author=author, name=f'Рецепт {recipe}', text='Описание',
+                cooking_time=10,
+            )
+        authors.append(author)
+    return authors
+
+
+def subscribe(user, authors):
+    for author in authors:
+        Subscription.objects.create(user=user, author=author)
+
+
+def latest_ids(author, limit):
+    return list(author.recipes.order_by('-pub_date', '-id').values_list(
+        'pk', flat=True
+    )[:limit])
+
+
+@pytest.mark.django_db
+def test_recipes_limit_applied(user_client, user):
+    authors = create_authors(3)
+    subscribe(user, authors)
+    response = user_client.get(URL, {'recipes_limit': 2, 'limit': 10})
+    assert response.status_code == 200
+    by_id = {item['id']: item for item in response.data['results']}
+    for author in authors:
+        item = by_id[author.pk]
+        assert [recipe['id'] for recipe in item['recipes']] == latest_ids(
+            author, 2
+        )
+        assert item['recipes_count'] == RECIPES_PER_AUTHOR
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('recipes_limit, expected', (
+    ('abc', DEFAULT_RECIPES_LIMIT),
+    ('', DEFAULT_RECIPES_LIMIT),
+    ('-1', 0),
+    ('0', 0),
+    ('100', RECIPES_PER_AUTHOR),
+))
+def test_recipes_limit_values(user_client, user, recipes_limit, expected):
+    subscribe(user, create_authors(1))
+    response = user_client.get(URL, {'recipes_limit': recipes_limit})
+    assert response.status_code == 200
+    assert len(response.data['results'][0]['recipes']) == expected
+
+
+@pytest.mark.django_db
+def test_subscribe_recipes_limit(user_client):
+    author, = create_authors(1)
+    response = user_client.post(
+        f'/api/users/{author.pk}/subscribe/?recipes_limit=1'
+    )
+    assert response.status_code == 201
+    assert [recipe['id'] for recipe in response.data['recipes']] == (
+        latest_ids(author, 1)
+    )
+
+
+@pytest.mark.django_db
+def test_queries_do_not_grow_with_subscriptions(user_client, user):
+    def count_queries():
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get(
+                URL, {'recipes_limit': 2, 'limit': 100}
+            )
+        assert response.status_code == 200
+        return len(context)
+
+    subscribe(user, create_authors(2))
+    few = count_queries()
+    subscribe(user, create_authors(8, start=2))
+    assert count_queries() == few
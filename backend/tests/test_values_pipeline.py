@@ -0,0 +1,70 @@
+import pytest
+
+URLS = (
+    '/api/recipes/',
+    '/api/recipes/?limit=3&page=2',
+    '/api/recipes/?tags=breakfast&tags=dinner',
+    '/api/recipes/?is_favorited=1',
+    '/api/recipes/?is_in_shopping_cart=1',
+    '/api/recipes/?cursor=&limit=3',
+)
+
+
+def fetch(client, settings, pipeline, url):
+    settings.RECIPE_READ_PIPELINE = pipeline
+    response = client.get(url)
+    assert response.status_code == 200, response.content
+    return response.json()
+
+
+def fetch_both(client, settings, url):
+    return (
+        fetch(client, settings, 'serializer', url),
+        fetch(client, settings, 'values', url),
+    )
+
+
+@pytest.fixture(params=['anon', 'user'])
+def client(request, anon_client, user_client):
+    return {'anon': anon_client, 'user': user_client}[request.param]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', URLS)
+def test_list_matches_serializer(client, settings, recipes, url):
+    expected, actual = fetch_both(client, settings, url)
+    assert actual == expected
+
+
+@pytest.mark.django_db
+def test_detail_matches_serializer(client, settings, recipes):
+    for recipe in recipes[:3]:
+        expected, actual = fetch_both(
+            client, settings, f'/api/recipes/{recipe.pk}/'
+        )
+        assert actual == expected
+
+
+@pytest.mark.django_db
+def test_cursor_pages_match_serializer(client, settings, recipes):
+    url = '/api/recipes/?cursor=&limit=3'
+    pages = 0
+    while url:
+        expected, actual = fetch_both(client, settings, url)
+        assert actual == expected
+        url = expected['next']
+        pages += 1
+    assert pages == 3
+
+
+@pytest.mark.django_db
+def test_user_flags_are_set(user_client, settings, recipes):
+    for pipeline in ('serializer', 'values'):
+        data = fetch(
+            user_client, settings, pipeline, '/api/recipes/?is_favorited=1'
+        )
+        assert data['count'] == 4
+        assert all(item['is_favorited'] for item in data['results'])
+        assert all(
+            item['author']['is_subscribed'] for item in data['results']
+        )
@@ -1,7 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from django.db import models
 
 from users.models import Subscription
 
@@ -17,7 +16,7 @@ class UserAdmin(BaseUserAdmin):
         'last_name',
         'is_staff',
         'is_superuser',
-        'subscribers_count',
+        'followers_count',
         'recipes_count',
     )
     search_fields = ('email', 'username', 'first_name', 'last_name')
@@ -45,20 +44,6 @@ class UserAdmin(BaseUserAdmin):
         }),
     )
 
-    def get_queryset(self, request):
-        return super().get_queryset(request).annotate(
-            _subscribers_count=models.Count('following', distinct=True),
-            _recipes_count=models.Count('recipes', distinct=True)
-        )
-
-    @admin.display(description='Подписчики')
-    def subscribers_count(self, obj):
-        return obj._subscribers_count or 0
-
-    @admin.display(description='Рецепты')
-    def recipes_count(self, obj):
-        return obj._recipes_count or 0
-
 
 @admin.register(Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
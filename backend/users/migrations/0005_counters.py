@@ -0,0 +1,28 @@
+# Generated by Django 3.2.3 on 2026-10-17 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_alter_subscription_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Подписчики'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Подписки'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Рецепты'),
+        ),
+    ]
@@ -10,7 +10,29 @@ from users.constants import (
 )
 
 
-class User(AbstractUser):
+class DenormalizedFieldsMixin:
+    """
+    Сохранение существующей строки целиком не трогает полей
+    denormalized_fields: их меняют только запросы с F()
+    и пересчёты, а в загруженном объекте они могут быть устаревшими.
+    """
+    denormalized_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and not kwargs.get('force_insert')
+            and kwargs.get('update_fields') is None
+        ):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.denormalized_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class User(DenormalizedFieldsMixin, AbstractUser):
     email = models.EmailField(
         'Электронная почта',
         max_length=EMAIL_MAX_LENGTH,
@@ -37,6 +59,18 @@ class User(AbstractUser):
         blank=True,
         null=True,
     )
+    avatar_variants_source = models.CharField(
+        'Аватар с готовыми вариантами',
+        max_length=255,
+        blank=True,
+        editable=False,
+    )
+    recipes_count = models.PositiveIntegerField('Рецепты', default=0)
+    followers_count = models.PositiveIntegerField('Подписчики', default=0)
+    following_count = models.PositiveIntegerField('Подписки', default=0)
+    denormalized_fields = (
+        'recipes_count', 'followers_count', 'following_count'
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
@@ -0,0 +1,45 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.feed import backfill, remove_authors
+from recipes.signals import is_muted
+from users.models import Subscription, User
+
+
+def update_subscription_counters(user_id, author_ids, delta):
+    """
+    Изменяет счётчики подписок пользователя и подписчиков авторов.
+    """
+    User.objects.filter(pk=user_id).update(
+        following_count=F('following_count') + delta * len(author_ids)
+    )
+    User.objects.filter(pk__in=author_ids).update(
+        followers_count=F('followers_count') + delta
+    )
+
+
+def subscriptions_changed(user_id, author_ids, delta):
+    """
+    Обновляет производные данные после подписки (delta=1)
+    или отписки (delta=-1) пользователя от авторов.
+    Вызывается сигналами и пакетными операциями.
+    """
+    update_subscription_counters(user_id, author_ids, delta)
+    if delta > 0:
+        backfill(user_id, author_ids)
+    else:
+        remove_authors(user_id, author_ids)
+
+
+@receiver(post_save, sender=Subscription)
+def add_subscription(sender, instance, created, **kwargs):
+    if created and not is_muted(sender):
+        subscriptions_changed(instance.user_id, [instance.author_id], 1)
+
+
+@receiver(post_delete, sender=Subscription)
+def remove_subscription(sender, instance, **kwargs):
+    if is_muted(sender):
+        return
+    subscriptions_changed(instance.user_id, [instance.author_id], -1)